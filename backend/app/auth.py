@@ -12,6 +12,7 @@ from .config import settings
 from .database import get_database
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -43,7 +44,8 @@ async def get_current_user(
     user_id = verify_token(token)
     
     db = get_database()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    # Legacy liked_reels arrays can be large and are never needed here
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"liked_reels": 0})
     
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -51,6 +53,22 @@ async def get_current_user(
     return user
 
 
+def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    """User id from the bearer token, without a database lookup"""
+    return verify_token(credentials.credentials)
+
+
+def get_optional_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[str]:
+    """User id from the bearer token if one is sent, without a database lookup"""
+    if credentials is None:
+        return None
+    return verify_token(credentials.credentials)
+
+
 def verify_google_token(token: str):
     """Verify Google OAuth token (supports both ID tokens and access tokens)"""
     try:
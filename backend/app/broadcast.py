@@ -0,0 +1,88 @@
+"""
+Cross-worker broadcast over a tailed capped collection
+
+Every worker inserts its messages into a small capped collection and follows
+it with a tailable cursor, so broadcasts need no infrastructure beyond the
+database we already have. The cache invalidation bus and the order event
+broker are both built on CappedCollectionBroadcaster.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional
+
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from .database import get_database
+
+# Distinguishes this worker's own messages on the shared collections
+WORKER_ID = str(ObjectId())
+
+
+class CappedCollectionBroadcaster:
+    """
+    Publishes payloads to a capped collection and hands the payloads other
+    workers publish to `handler`
+
+    Messages from this worker are skipped by the listener; publishers
+    deliver locally themselves.
+    """
+
+    def __init__(self, collection: str, handler: Callable[[Any], None]):
+        self.collection = collection
+        self.handler = handler
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, payload):
+        await get_database()[self.collection].insert_one({"payload": payload, "origin": WORKER_ID})
+
+    async def publish_many(self, payloads: List):
+        """Publish several payloads with a single insert"""
+        if not payloads:
+            return
+        await get_database()[self.collection].insert_many(
+            [{"payload": payload, "origin": WORKER_ID} for payload in payloads]
+        )
+
+    async def start(self):
+        db = get_database()
+        try:
+            await db.create_collection(self.collection, capped=True, size=1024 * 1024, max=10000)
+        except CollectionInvalid:
+            pass
+        # A tailable cursor dies on an empty collection, so make sure there is a tail to follow
+        marker = await db[self.collection].insert_one({"payload": None, "origin": WORKER_ID})
+        self._task = asyncio.create_task(self._listen(marker.inserted_id))
+
+    async def _listen(self, last_id):
+        collection = get_database()[self.collection]
+        while True:
+            try:
+                # Resume right after the last message seen, by its position in
+                # the collection: ObjectIds from different workers are not
+                # ordered, so an _id range would drop some of their messages.
+                # If it has already been evicted, everything left is newer.
+                skipping = await collection.find_one({"_id": last_id}, {"_id": 1}) is not None
+                cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for message in cursor:
+                        if skipping:
+                            skipping = message["_id"] != last_id
+                            continue
+                        last_id = message["_id"]
+                        if message.get("origin") != WORKER_ID and message.get("payload"):
+                            self.handler(message["payload"])
+                    # Caught up without meeting it: evicted while we were scanning
+                    skipping = False
+                    await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ {self.collection} listener error: {e}")
+            await asyncio.sleep(1)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,292 @@
+"""
+Streaming bulk import of restaurants and menu items
+
+Accepts NDJSON (one JSON object per line) or CSV with a header row. Every
+row has a `type` of `restaurant` or `menu_item`:
+
+- restaurants take the RestaurantCreate fields plus an optional `ref`, a
+  file-local key that later menu item rows can point at;
+- menu items take the MenuItemCreate fields plus either `restaurant_id`
+  (an existing restaurant) or `restaurant_ref` (a restaurant earlier in the
+  same file).
+
+The upload is read line by line and handled in chunks of IMPORT_CHUNK_SIZE
+rows: each chunk is validated with the regular schemas and written with
+unordered bulk_write batches, so memory stays flat and one bad row only
+fails itself. CSV fields may not contain line breaks.
+"""
+import csv
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import UploadFile
+from pydantic import ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from . import schemas
+from .cache import invalidate_restaurants
+from .config import settings
+from .models import MenuItemDB, RestaurantDB
+from .search import restaurant_ngrams, trigrams
+
+# Stop collecting row errors past this many; the counts stay exact
+MAX_REPORTED_ERRORS = 1000
+
+# Longer lines are reported as row errors instead of being buffered
+MAX_LINE_BYTES = 1024 * 1024
+
+_READ_SIZE = 64 * 1024
+
+
+async def _lines(upload: UploadFile) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield (line number, raw bytes) from an upload without reading it whole
+
+    A line longer than MAX_LINE_BYTES is yielded as None and the rest of it
+    is discarded unread, so one line without a newline can't fill memory.
+    """
+    buffer = b""
+    overflow = False
+    line_no = 0
+    while True:
+        chunk = await upload.read(_READ_SIZE)
+        if not chunk:
+            break
+        # Only the new chunk is scanned for newlines
+        *complete, rest = chunk.split(b"\n")
+        for piece in complete:
+            line_no += 1
+            raw = None if overflow else buffer + piece
+            buffer, overflow = b"", False
+            yield line_no, raw if raw is not None and len(raw) <= MAX_LINE_BYTES else None
+        if not overflow:
+            buffer += rest
+            if len(buffer) > MAX_LINE_BYTES:
+                buffer, overflow = b"", True
+    if overflow:
+        yield line_no + 1, None
+    elif buffer:
+        yield line_no + 1, buffer
+
+
+async def _rows(upload: UploadFile, file_format: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, row, parse error) for each non-empty line"""
+    header = None
+    async for line_no, raw in _lines(upload):
+        if raw is None:
+            yield line_no, None, f"Line is longer than {MAX_LINE_BYTES} bytes"
+            continue
+        try:
+            line = raw.decode("utf-8-sig").rstrip("\r")
+        except UnicodeDecodeError:
+            yield line_no, None, "Line is not valid UTF-8"
+            continue
+        if not line.strip():
+            continue
+        if file_format == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            # Empty CSV cells mean "not provided"
+            yield line_no, {k: v for k, v in zip(header, values) if v != ""}, None
+        else:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "Each line must be a JSON object"
+                continue
+            yield line_no, row, None
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+
+
+class _Importer:
+    def __init__(self, db):
+        self.db = db
+        self.refs: Dict[str, str] = {}  # file ref -> restaurant id
+        self.known_restaurants: set = set()
+        self.created_restaurants: set = set()  # Can't be cached yet, so never invalidated
+        self.touched_restaurants: set = set()  # Existing restaurants whose menus changed
+        self.restaurants_created = 0
+        self.menu_items_created = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    async def process_chunk(self, chunk: List[Tuple[int, dict]]):
+        restaurant_rows = [(line, row) for line, row in chunk if row.get("type") == "restaurant"]
+        item_rows = [(line, row) for line, row in chunk if row.get("type") == "menu_item"]
+        for line, row in chunk:
+            if row.get("type") not in ("restaurant", "menu_item"):
+                self.error(line, "type must be 'restaurant' or 'menu_item'")
+
+        await self._import_restaurants(restaurant_rows)
+        await self._import_menu_items(item_rows)
+
+    async def _import_restaurants(self, rows: List[Tuple[int, dict]]):
+        inserts, lines, refs = [], [], []
+        for line, row in rows:
+            try:
+                restaurant = schemas.RestaurantCreate(**row)
+            except ValidationError as e:
+                self.error(line, _validation_message(e))
+                continue
+
+            location = None
+            if restaurant.latitude is not None and restaurant.longitude is not None:
+                location = {"type": "Point", "coordinates": [restaurant.longitude, restaurant.latitude]}
+            doc = RestaurantDB(
+                **restaurant.dict(exclude={"latitude", "longitude"}),
+                location=location,
+                search_ngrams=restaurant_ngrams(restaurant.name, restaurant.cuisine)
+            ).dict(by_alias=True, exclude={"id"})
+            doc["_id"] = ObjectId()
+            inserts.append(InsertOne(doc))
+            lines.append(line)
+            refs.append((row.get("ref"), str(doc["_id"])))
+
+        failed = await self._bulk_write(self.db.restaurants, inserts, lines)
+        for i, (ref, restaurant_id) in enumerate(refs):
+            if i in failed:
+                continue
+            self.restaurants_created += 1
+            self.known_restaurants.add(restaurant_id)
+            self.created_restaurants.add(restaurant_id)
+            if ref:
+                self.refs[str(ref)] = restaurant_id
+
+    async def _import_menu_items(self, rows: List[Tuple[int, dict]]):
+        # Resolve restaurants by ref or id; unknown ids are checked in one query
+        resolved = []
+        unknown_ids = set()
+        for line, row in rows:
+            if row.get("restaurant_ref") is not None:
+                restaurant_id = self.refs.get(str(row["restaurant_ref"]))
+                if restaurant_id is None:
+                    self.error(line, f"Unknown restaurant_ref '{row['restaurant_ref']}'")
+                    continue
+            else:
+                restaurant_id = row.get("restaurant_id")
+                if not restaurant_id or not ObjectId.is_valid(restaurant_id):
+                    self.error(line, "restaurant_id or restaurant_ref is required")
+                    continue
+                if restaurant_id not in self.known_restaurants:
+                    unknown_ids.add(restaurant_id)
+            resolved.append((line, row, restaurant_id))
+
+        if unknown_ids:
+            async for r in self.db.restaurants.find(
+                {"_id": {"$in": [ObjectId(i) for i in unknown_ids]}},
+                {"_id": 1}
+            ):
+                self.known_restaurants.add(str(r["_id"]))
+
+        now = datetime.utcnow()
+        inserts, lines, items = [], [], []
+        for line, row, restaurant_id in resolved:
+            if restaurant_id not in self.known_restaurants:
+                self.error(line, "Restaurant not found")
+                continue
+            try:
+                menu_item = schemas.MenuItemCreate(**row)
+            except ValidationError as e:
+                self.error(line, _validation_message(e))
+                continue
+            doc = MenuItemDB(
+                id=str(uuid.uuid4()),
+                restaurant_id=restaurant_id,
+                # Keep file order within a restaurant's menu
+                created_at=now + timedelta(milliseconds=len(inserts)),
+                **menu_item.dict()
+            ).dict(by_alias=True)
+            inserts.append(InsertOne(doc))
+            lines.append(line)
+            items.append(doc)
+
+        failed = await self._bulk_write(self.db.menu_items, inserts, lines)
+
+        # Keep each touched restaurant's search fields in step with its menu
+        names: Dict[str, set] = {}
+        for i, item in enumerate(items):
+            if i not in failed:
+                self.menu_items_created += 1
+                names.setdefault(item["restaurant_id"], set()).add(item["name"])
+        if names:
+            await self.db.restaurants.bulk_write([
+                UpdateOne(
+                    {"_id": ObjectId(restaurant_id)},
+                    {"$addToSet": {
+                        "menu_item_names": {"$each": sorted(item_names)},
+                        "search_ngrams": {"$each": sorted(set().union(*(trigrams(n) for n in item_names)))}
+                    }}
+                )
+                for restaurant_id, item_names in names.items()
+            ], ordered=False)
+            self.touched_restaurants.update(set(names) - self.created_restaurants)
+
+    async def _bulk_write(self, collection, inserts: List[InsertOne], lines: List[int]) -> set:
+        """Unordered bulk insert; returns the indexes of the operations that failed"""
+        if not inserts:
+            return set()
+        try:
+            await collection.bulk_write(inserts, ordered=False)
+        except BulkWriteError as e:
+            failed = set()
+            for err in e.details.get("writeErrors", []):
+                failed.add(err["index"])
+                self.error(lines[err["index"]], err.get("errmsg", "Write failed"))
+            return failed
+        return set()
+
+
+def detect_format(upload: UploadFile, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    filename = (upload.filename or "").lower()
+    if filename.endswith(".csv") or (upload.content_type or "").startswith("text/csv"):
+        return "csv"
+    return "ndjson"
+
+
+async def import_catalog(db, upload: UploadFile, file_format: str) -> dict:
+    """Stream an NDJSON/CSV upload into restaurants and menu_items"""
+    importer = _Importer(db)
+    chunk: List[Tuple[int, dict]] = []
+
+    try:
+        async for line, row, parse_error in _rows(upload, file_format):
+            if parse_error:
+                importer.error(line, parse_error)
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                await importer.process_chunk(chunk)
+                chunk = []
+        if chunk:
+            await importer.process_chunk(chunk)
+    finally:
+        # One batched publish for every existing restaurant whose menu changed
+        await invalidate_restaurants(importer.touched_restaurants)
+
+    return {
+        "restaurants_created": importer.restaurants_created,
+        "menu_items_created": importer.menu_items_created,
+        "error_count": importer.error_count,
+        "errors": sorted(importer.errors, key=lambda e: e["line"])
+    }
@@ -0,0 +1,150 @@
+"""
+In-process restaurant cache with cross-worker invalidation
+
+Restaurant detail and menu responses are cached per worker as prebuilt
+JSON bytes in a bounded LRU with a TTL. Writes call invalidate_restaurant,
+which drops the local entries and publishes the id on an invalidation bus so
+every other worker drops theirs too:
+
+- MongoInvalidationBus tails a small capped collection (see broadcast.py),
+  so it needs no infrastructure beyond the database we already have.
+- InMemoryInvalidationBus delivers within the process only, for tests and
+  single-worker development (CACHE_INVALIDATION_BACKEND=memory).
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List, Optional
+
+from .broadcast import CappedCollectionBroadcaster
+from .config import settings
+
+INVALIDATION_COLLECTION = "cache_invalidations"
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str):
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class InMemoryInvalidationBus:
+    """Delivers invalidations to subscribers in this process only"""
+
+    def __init__(self):
+        self._handlers: List[Callable[[str], None]] = []
+
+    def subscribe(self, handler: Callable[[str], None]):
+        self._handlers.append(handler)
+
+    async def publish(self, key: str):
+        await self.publish_many([key])
+
+    async def publish_many(self, keys: List[str]):
+        for key in keys:
+            for handler in self._handlers:
+                handler(key)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class MongoInvalidationBus:
+    """Broadcasts invalidations to every worker through a tailed capped collection"""
+
+    def __init__(self):
+        self._handlers: List[Callable[[str], None]] = []
+        self._broadcaster = CappedCollectionBroadcaster(INVALIDATION_COLLECTION, self._notify)
+
+    def subscribe(self, handler: Callable[[str], None]):
+        self._handlers.append(handler)
+
+    def _notify(self, key: str):
+        for handler in self._handlers:
+            handler(key)
+
+    async def publish(self, key: str):
+        await self.publish_many([key])
+
+    async def publish_many(self, keys: List[str]):
+        """Publish several keys with a single insert"""
+        # Local subscribers are notified directly; the listener skips our own messages
+        for key in keys:
+            self._notify(key)
+        await self._broadcaster.publish_many(keys)
+
+    async def start(self):
+        await self._broadcaster.start()
+
+    async def stop(self):
+        await self._broadcaster.stop()
+
+
+restaurant_cache = TTLCache(settings.RESTAURANT_CACHE_SIZE, settings.RESTAURANT_CACHE_TTL_SECONDS)
+
+if settings.CACHE_INVALIDATION_BACKEND == "memory":
+    invalidation_bus = InMemoryInvalidationBus()
+else:
+    invalidation_bus = MongoInvalidationBus()
+
+
+def _drop_restaurant(restaurant_id: str):
+    restaurant_cache.invalidate(f"detail:{restaurant_id}")
+    restaurant_cache.invalidate_prefix(f"menu:{restaurant_id}:")
+
+
+invalidation_bus.subscribe(_drop_restaurant)
+
+
+async def invalidate_restaurant(restaurant_id: str):
+    """Drop cached responses for a restaurant on every worker"""
+    await invalidation_bus.publish(restaurant_id)
+
+
+async def invalidate_restaurants(restaurant_ids: Iterable[str]):
+    """invalidate_restaurant for many restaurants, published as one batch"""
+    await invalidation_bus.publish_many(list(restaurant_ids))
@@ -24,7 +24,16 @@ class Settings(BaseSettings):
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
     UPLOAD_DIR: str = "uploads"
+    INGEST_SPOOL_DIR: str = "ingest_spool"  # Raw uploads awaiting ingest; must not be under UPLOAD_DIR
     MAX_FILE_SIZE: int = 10485760  # 10MB
+    MEDIA_MAX_CONCURRENCY: int = 4  # Parallel Cloudinary calls per worker
+    MEDIA_TIMEOUT_SECONDS: int = 120
+    MEDIA_STORAGE_BACKEND: str = "cloudinary"  # cloudinary, local
+    INGEST_WORKERS: int = 2
+    INGEST_STALE_SECONDS: int = 900  # Requeue (or fail, if the spool is gone) jobs stuck this long
+    MEDIA_DELETE_BATCH_SIZE: int = 50
+    MEDIA_DELETE_RETRY_SECONDS: int = 30  # First retry delay, doubled per attempt
+    MEDIA_DELETE_MAX_BACKOFF_SECONDS: int = 3600
     
     # Email Settings
     SMTP_HOST: str = "smtp.gmail.com"
@@ -35,6 +44,43 @@ class Settings(BaseSettings):
     EMAILS_FROM_NAME: str = "Feastverse"
     EMAILS_ENABLED: bool = False  # Set to True when SMTP is configured
     
+    # Personalized feed
+    FEED_TIMELINE_LENGTH: int = 500
+    FEED_FANOUT_BATCH_SIZE: int = 1000
+    
+    # Restaurant discovery
+    DELIVERY_MINUTES_PER_KM: float = 3.0
+    
+    # Order tracking
+    ORDER_EVENTS_BACKEND: str = "mongo"  # mongo, memory
+    ORDER_EVENTS_HEARTBEAT_SECONDS: int = 15
+    
+    # Rating statistics
+    RATING_STATS_WINDOW_DAYS: int = 30
+    
+    # Bulk catalog import
+    IMPORT_CHUNK_SIZE: int = 500
+    
+    # Restaurant cache
+    RESTAURANT_CACHE_SIZE: int = 1000
+    RESTAURANT_CACHE_TTL_SECONDS: int = 300
+    CACHE_INVALIDATION_BACKEND: str = "mongo"  # mongo, memory
+    
+    # Trending reels
+    TRENDING_LIKE_WEIGHT: float = 3.0
+    TRENDING_VIEW_WEIGHT: float = 0.1
+    TRENDING_HALF_LIFE_HOURS: float = 24.0
+    TRENDING_WINDOW_DAYS: int = 7
+    
+    # Background jobs
+    LIKES_RECONCILE_INTERVAL_SECONDS: int = 3600
+    RATINGS_RECONCILE_INTERVAL_SECONDS: int = 3600
+    RATINGS_ROLLUP_INTERVAL_SECONDS: int = 900
+    VIEWS_FLUSH_INTERVAL_SECONDS: int = 10
+    TRENDING_RECOMPUTE_INTERVAL_SECONDS: int = 300
+    MEDIA_DELETE_INTERVAL_SECONDS: int = 30
+    INGEST_RECOVERY_INTERVAL_SECONDS: int = 300
+    
     class Config:
         env_file = ".env"
 
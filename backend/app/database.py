@@ -1,7 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pymongo.errors import DuplicateKeyError
 import certifi
 from .config import settings
 
+REVIEW_UNIQUE_INDEX = "review_user_restaurant_unique"
+
 class Database:
     client: AsyncIOMotorClient = None
     db = None
@@ -32,6 +36,95 @@ async def connect_to_mongo():
         raise
 
 
+async def ensure_indexes():
+    """Create the indexes the query paths rely on (no-op when they already exist)"""
+    # Keyset pagination: (created_at, _id) in the same order the feeds sort by
+    await db.db.reels.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+    await db.db.restaurants.create_index([("created_at", ASCENDING), ("_id", ASCENDING)])
+    await db.db.orders.create_index(
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+    )
+    
+    # Restaurant filters: cuisine equality then the listing sort, plus the range filters
+    await db.db.restaurants.create_index(
+        [("cuisine", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]
+    )
+    await db.db.restaurants.create_index([("cuisine", ASCENDING), ("rating", DESCENDING)])
+    await db.db.restaurants.create_index("rating")
+    await db.db.restaurants.create_index("delivery_fee")
+    await db.db.restaurants.create_index("eta_mins")
+    
+    # Restaurant search: weighted full-text index plus trigrams for fuzzy matching
+    # (a collection has one text index, so replace the one built on embedded menus)
+    if "restaurant_text" in await db.db.restaurants.index_information():
+        await db.db.restaurants.drop_index("restaurant_text")
+    await db.db.restaurants.create_index(
+        [("name", TEXT), ("cuisine", TEXT), ("description", TEXT), ("menu_item_names", TEXT)],
+        weights={"name": 10, "cuisine": 5, "menu_item_names": 3, "description": 1},
+        name="restaurant_search_text"
+    )
+    await db.db.restaurants.create_index("search_ngrams")
+    
+    # Menu items: per-restaurant menus in insertion order
+    await db.db.menu_items.create_index(
+        [("restaurant_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)]
+    )
+    
+    # Nearby restaurants
+    await db.db.restaurants.create_index([("location", GEOSPHERE)])
+    
+    # Personalized feed: follower lookup on fan-out, per-restaurant reels on read-time merge
+    await db.db.users.create_index("followed_restaurants")
+    await db.db.users.create_index("subscribed_restaurants")
+    await db.db.reels.create_index(
+        [("restaurant_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+    )
+    
+    # Reel likes: one document per (user, reel); reel_id for counts and cleanup
+    await db.db.reel_likes.create_index(
+        [("user_id", ASCENDING), ("reel_id", ASCENDING)], unique=True
+    )
+    await db.db.reel_likes.create_index("reel_id")
+    
+    # Restaurant followers/subscribers: one edge per (user, restaurant, kind);
+    # restaurant_id leads the second index for the follower listing
+    await db.db.restaurant_followers.create_index(
+        [("user_id", ASCENDING), ("restaurant_id", ASCENDING), ("kind", ASCENDING)], unique=True
+    )
+    await db.db.restaurant_followers.create_index(
+        [("restaurant_id", ASCENDING), ("kind", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+    )
+    
+    # Restaurant reviews: one index per sort option (lowest-first scans the rating index backwards)
+    await db.db.reviews.create_index(
+        [("restaurant_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+    )
+    await db.db.reviews.create_index(
+        [("restaurant_id", ASCENDING), ("rating", DESCENDING), ("_id", DESCENDING)]
+    )
+    # One review per user and restaurant; with duplicates left over from before
+    # this index, migrations.dedupe_reviews cleans them up and builds it instead
+    try:
+        await db.db.reviews.create_index(
+            [("user_id", ASCENDING), ("restaurant_id", ASCENDING)],
+            unique=True, name=REVIEW_UNIQUE_INDEX
+        )
+    except DuplicateKeyError:
+        print("⚠️ Duplicate reviews found; the unique review index is built after migrations")
+    # Recent-window rating rollup
+    await db.db.reviews.create_index("created_at")
+    
+    # Trending page: one sorted read
+    await db.db.reels.create_index([("trending_score", DESCENDING), ("_id", DESCENDING)])
+    
+    # Reel ingest: requeue scan on startup
+    await db.db.reel_jobs.create_index("status")
+    
+    # Media deletion outbox: due entries and claimed batches
+    await db.db.media_deletions.create_index("next_attempt_at")
+    await db.db.media_deletions.create_index("claim", sparse=True)
+
+
 async def close_mongo_connection():
     """Close MongoDB connection"""
     db.client.close()
@@ -0,0 +1,91 @@
+"""
+Personalized home feed (fan-out on write)
+
+Each user has one document in `feed_timelines` keyed by their user id that
+holds the newest reels from the restaurants they follow or subscribe to,
+capped at FEED_TIMELINE_LENGTH entries. create_reel pushes new reels into
+the timelines of that restaurant's followers, so reading a feed is a single
+_id lookup. Users without a materialized timeline (new users, or after a
+follow change invalidated it) get a read-time merge over their restaurants,
+which is then stored as their timeline.
+"""
+from datetime import datetime
+from typing import List
+
+from pymongo import UpdateOne
+
+from .config import settings
+
+
+def _restaurant_ids(user: dict) -> List[str]:
+    return list(set(user.get("followed_restaurants", [])) | set(user.get("subscribed_restaurants", [])))
+
+
+async def fan_out_reel(db, reel_id, restaurant_id: str, created_at: datetime):
+    """Push a new reel into the timeline of every follower/subscriber of its restaurant"""
+    entry = {"reel_id": reel_id, "created_at": created_at}
+    followers = db.users.find(
+        {"$or": [
+            {"followed_restaurants": restaurant_id},
+            {"subscribed_restaurants": restaurant_id}
+        ]},
+        {"_id": 1}
+    )
+
+    batch = []
+    async for follower in followers:
+        # Only touch timelines that already exist; missing ones are rebuilt on read
+        batch.append(UpdateOne(
+            {"_id": str(follower["_id"])},
+            {
+                "$push": {"entries": {
+                    "$each": [entry],
+                    "$sort": {"created_at": -1},
+                    "$slice": settings.FEED_TIMELINE_LENGTH
+                }},
+                "$set": {"updated_at": datetime.utcnow()}
+            }
+        ))
+        if len(batch) >= settings.FEED_FANOUT_BATCH_SIZE:
+            await db.feed_timelines.bulk_write(batch, ordered=False)
+            batch = []
+
+    if batch:
+        await db.feed_timelines.bulk_write(batch, ordered=False)
+
+
+async def invalidate_timeline(db, user_id: str):
+    """Drop a user's materialized timeline so the next read rebuilds it"""
+    await db.feed_timelines.delete_one({"_id": user_id})
+
+
+async def _rebuild_timeline(db, user: dict) -> List[dict]:
+    """Read-time merge of the newest reels across all of the user's restaurants"""
+    restaurant_ids = _restaurant_ids(user)
+    entries = []
+    if restaurant_ids:
+        reels = db.reels.find(
+            {"restaurant_id": {"$in": restaurant_ids}},
+            {"_id": 1, "created_at": 1}
+        ).sort([("created_at", -1), ("_id", -1)]).limit(settings.FEED_TIMELINE_LENGTH)
+        entries = [{"reel_id": r["_id"], "created_at": r["created_at"]} async for r in reels]
+
+    await db.feed_timelines.replace_one(
+        {"_id": str(user["_id"])},
+        {"entries": entries, "updated_at": datetime.utcnow()},
+        upsert=True
+    )
+    return entries
+
+
+async def read_timeline(db, user: dict, skip: int, limit: int) -> List[dict]:
+    """Return one page of timeline entries (reel_id, created_at), newest first"""
+    timeline = await db.feed_timelines.find_one(
+        {"_id": str(user["_id"])},
+        {"entries": {"$slice": [skip, limit]}}
+    )
+    if timeline is not None:
+        return timeline.get("entries", [])
+
+    entries = await _rebuild_timeline(db, user)
+    return entries[skip:skip + limit]
@@ -0,0 +1,188 @@
+"""
+Background reel ingest pipeline
+
+create_reel only spools the upload to disk and records a job in
+`reel_jobs`; a small pool of in-process workers then uploads the video to
+the configured storage backend, builds the thumbnail URL and inserts the
+ReelDB record. Clients follow progress through GET /reels/jobs/{id}.
+
+Storage is pluggable (see storage.py), so with the LocalStorage backend the
+whole pipeline can run offline in development and tests.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from bson import ObjectId
+
+from .config import settings
+from .database import get_database
+from .feed import fan_out_reel
+from .models import ReelDB, ReelJobDB
+from .storage import get_storage
+
+# Outside UPLOAD_DIR, which is served publicly at /uploads
+SPOOL_DIR = Path(settings.INGEST_SPOOL_DIR)
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+
+def spool_path(filename: str) -> Path:
+    """Pick a unique spool location for an incoming upload"""
+    SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+    return SPOOL_DIR / f"{ObjectId()}{os.path.splitext(filename or '')[1]}"
+
+
+async def submit_reel_job(user_id: str, title: str, restaurant_id: Optional[str], file_path: str) -> dict:
+    """Record an ingest job for a spooled upload and queue it for the workers"""
+    db = get_database()
+    job = ReelJobDB(
+        user_id=user_id,
+        title=title,
+        restaurant_id=restaurant_id,
+        file_path=file_path
+    )
+    job_doc = job.dict(by_alias=True, exclude={"id"})
+    result = await db.reel_jobs.insert_one(job_doc)
+    job_doc["_id"] = result.inserted_id
+    _queue.put_nowait(result.inserted_id)
+    return job_doc
+
+
+async def _set_status(db, job_id, status: str, **fields):
+    await db.reel_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"status": status, "updated_at": datetime.utcnow(), **fields}}
+    )
+
+
+def _remove_spool(job: dict):
+    if os.path.exists(job["file_path"]):
+        os.unlink(job["file_path"])
+
+
+async def _process_job(job_id):
+    db = get_database()
+
+    # Claim the job atomically so a requeued job is never processed twice
+    job = await db.reel_jobs.find_one_and_update(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {"status": "processing", "updated_at": datetime.utcnow()}}
+    )
+    if not job:
+        return
+
+    reel_doc = None
+    reel_inserted = False
+    try:
+        storage = get_storage()
+        # Unique per job: the storage backends overwrite an existing public_id
+        public_id = f"reel_{job_id}"
+        upload_result = await storage.upload_video(job["file_path"], public_id)
+
+        if upload_result["success"]:
+            reel_data = ReelDB(
+                user_id=job["user_id"],
+                restaurant_id=job.get("restaurant_id"),
+                title=job["title"],
+                video_url=upload_result["url"],
+                public_id=upload_result["public_id"],
+                thumbnail_url=storage.thumbnail_url(upload_result["public_id"])
+            )
+            reel_doc = reel_data.dict(by_alias=True, exclude={"id"})
+            await db.reels.insert_one(reel_doc)
+            reel_inserted = True
+            await _set_status(db, job_id, "completed", reel_id=str(reel_doc["_id"]))
+        else:
+            await _set_status(db, job_id, "failed", error=f"Failed to upload video: {upload_result.get('error')}")
+    except asyncio.CancelledError:
+        # Shutdown mid-job: unless the reel already exists, hand the job back
+        # (spooled file included) to the next start
+        if reel_inserted:
+            await _set_status(db, job_id, "completed", reel_id=str(reel_doc["_id"]))
+            _remove_spool(job)
+        else:
+            await _set_status(db, job_id, "queued")
+        raise
+    except Exception as e:
+        await _set_status(db, job_id, "failed", error=str(e))
+
+    # The job is completed or failed, so the spooled upload is no longer needed
+    _remove_spool(job)
+
+    # The reel exists now, so a fan-out error must not mark the job failed
+    if reel_inserted and reel_doc.get("restaurant_id"):
+        try:
+            await fan_out_reel(db, reel_doc["_id"], reel_doc["restaurant_id"], reel_doc["created_at"])
+        except Exception as e:
+            print(f"❌ Feed fan-out for reel {reel_doc['_id']} failed: {e}")
+
+
+async def _worker():
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _process_job(job_id)
+        except Exception as e:
+            print(f"❌ Reel ingest job {job_id} crashed: {e}")
+        finally:
+            _queue.task_done()
+
+
+async def recover_stale_jobs():
+    """
+    Requeue or fail jobs stuck "queued" or "processing" for INGEST_STALE_SECONDS
+
+    Catches jobs whose worker died without a clean shutdown. A job whose
+    spooled upload is gone can never run, so it is marked failed instead,
+    which keeps GET /reels/jobs/{id} from waiting forever.
+    """
+    if _queue is None:
+        return
+    db = get_database()
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.INGEST_STALE_SECONDS)
+    query = {
+        "status": {"$in": ["queued", "processing"]},
+        "$or": [
+            {"updated_at": {"$lt": stale_before}},
+            {"updated_at": None, "created_at": {"$lt": stale_before}}
+        ]
+    }
+    async for job in db.reel_jobs.find(query, {"status": 1, "file_path": 1, "updated_at": 1}):
+        # Guarded on what we read, so a job a worker just picked up is left alone
+        guard = {"_id": job["_id"], "status": job["status"], "updated_at": job.get("updated_at")}
+        if os.path.exists(job["file_path"]):
+            result = await db.reel_jobs.update_one(guard, {"$set": {"status": "queued", "updated_at": now}})
+            if result.modified_count:
+                _queue.put_nowait(job["_id"])
+        else:
+            await db.reel_jobs.update_one(
+                guard,
+                {"$set": {"status": "failed", "error": "Spooled upload is missing", "updated_at": now}}
+            )
+
+
+async def start_ingest_workers():
+    """Start the worker pool and requeue jobs this process had spooled before a restart"""
+    global _queue
+    _queue = asyncio.Queue()
+
+    db = get_database()
+    async for job in db.reel_jobs.find({"status": "queued"}, {"file_path": 1}):
+        if os.path.exists(job["file_path"]):
+            _queue.put_nowait(job["_id"])
+
+    for _ in range(settings.INGEST_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_ingest_workers():
+    """Cancel the worker pool; in-flight jobs are put back to queued for the next start"""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+from pymongo import UpdateOne
+
+from .config import settings
+from .database import get_database
+from .ingest import recover_stale_jobs
+from .media_outbox import drain_media_deletions
+from .ratings import reconcile_restaurant_ratings, rollup_recent_ratings
+from .trending import recompute_trending_scores
+from .views import flush_views
+
+_tasks: List[asyncio.Task] = []
+
+
+async def reconcile_reel_likes():
+    """Repair drift between reels.likes_count and the reel_likes collection"""
+    db = get_database()
+
+    # Snapshot the counters before aggregating: a like made after this point
+    # changes likes_count, so the guarded update below skips that reel
+    reels = await db.reels.find({}, {"likes_count": 1}).to_list(length=None)
+
+    actual = {}
+    pipeline = [
+        {"$group": {"_id": "$reel_id", "count": {"$sum": 1}}}
+    ]
+    async for row in db.reel_likes.aggregate(pipeline):
+        actual[row["_id"]] = row["count"]
+
+    updates = []
+    for reel in reels:
+        count = actual.get(str(reel["_id"]), 0)
+        if reel.get("likes_count") != count:
+            updates.append(UpdateOne(
+                {"_id": reel["_id"], "likes_count": reel.get("likes_count")},
+                {"$set": {"likes_count": count}}
+            ))
+
+    if updates:
+        await db.reels.bulk_write(updates, ordered=False)
+        print(f"🔧 Reconciled likes_count on {len(updates)} reels")
+
+
+async def _run_periodically(name: str, job: Callable[[], Awaitable[None]], interval: int):
+    """Run a job now and then every `interval` seconds until cancelled"""
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Background job '{name}' failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_background_jobs():
+    """Schedule periodic maintenance jobs on the running event loop"""
+    jobs = [
+        ("reconcile_reel_likes", reconcile_reel_likes, settings.LIKES_RECONCILE_INTERVAL_SECONDS),
+        ("reconcile_restaurant_ratings", reconcile_restaurant_ratings, settings.RATINGS_RECONCILE_INTERVAL_SECONDS),
+        ("rollup_recent_ratings", rollup_recent_ratings, settings.RATINGS_ROLLUP_INTERVAL_SECONDS),
+        ("flush_views", flush_views, settings.VIEWS_FLUSH_INTERVAL_SECONDS),
+        ("recompute_trending_scores", recompute_trending_scores, settings.TRENDING_RECOMPUTE_INTERVAL_SECONDS),
+        ("drain_media_deletions", drain_media_deletions, settings.MEDIA_DELETE_INTERVAL_SECONDS),
+        ("recover_stale_jobs", recover_stale_jobs, settings.INGEST_RECOVERY_INTERVAL_SECONDS),
+    ]
+    for name, job, interval in jobs:
+        _tasks.append(asyncio.create_task(_run_periodically(name, job, interval)))
+
+
+async def stop_background_jobs():
+    """Cancel all scheduled jobs and wait for them to exit"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -5,7 +5,14 @@ from pathlib import Path
 from contextlib import asynccontextmanager
 
 from .config import settings
-from .database import connect_to_mongo, close_mongo_connection
+from .database import connect_to_mongo, close_mongo_connection, ensure_indexes
+from .migrations import run_migrations
+from .jobs import start_background_jobs, stop_background_jobs
+from .ingest import start_ingest_workers, stop_ingest_workers
+from .views import flush_views
+from . import media_service
+from .cache import invalidation_bus, restaurant_cache
+from .order_events import order_event_broker
 from .routers import auth, restaurants, reviews, reels, orders, stories, users
 
 
@@ -13,8 +20,20 @@ from .routers import auth, restaurants, reviews, reels, orders, stories, users
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    await ensure_indexes()
+    await run_migrations()
+    await invalidation_bus.start()
+    await order_event_broker.start()
+    start_background_jobs()
+    await start_ingest_workers()
     yield
     # Shutdown
+    await stop_ingest_workers()
+    await stop_background_jobs()
+    await flush_views()
+    media_service.shutdown()
+    await invalidation_bus.stop()
+    await order_event_broker.stop()
     await close_mongo_connection()
 
 
@@ -82,3 +101,9 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "database": "MongoDB Atlas"}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters of this worker's restaurant cache"""
+    return {"restaurants": restaurant_cache.stats()}
@@ -0,0 +1,95 @@
+"""
+Persistent outbox for media deletions
+
+delete_reel records the asset in `media_deletions` and returns; the
+drain_media_deletions job claims due entries in batches, deletes them from
+storage concurrently and removes the entries that succeeded. Failures are
+retried with exponential backoff (capped at MEDIA_DELETE_MAX_BACKOFF_SECONDS)
+until they go through, so storage cleanup is eventually guaranteed.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from .config import settings
+from .database import get_database
+from .storage import get_storage
+
+# How long a claimed batch is hidden from other workers while it is processed
+CLAIM_LEASE_SECONDS = 300
+
+
+async def enqueue_deletion(db, public_id: str, resource_type: str = "video"):
+    """Schedule an asset for deletion from storage"""
+    now = datetime.utcnow()
+    await db.media_deletions.insert_one({
+        "public_id": public_id,
+        "resource_type": resource_type,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "last_error": None,
+        "created_at": now
+    })
+
+
+def _backoff(attempts: int) -> timedelta:
+    seconds = settings.MEDIA_DELETE_RETRY_SECONDS * (2 ** (attempts - 1))
+    return timedelta(seconds=min(seconds, settings.MEDIA_DELETE_MAX_BACKOFF_SECONDS))
+
+
+async def _delete(storage, entry: dict) -> dict:
+    try:
+        return await storage.delete_video(entry["public_id"])
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+async def drain_media_deletions():
+    """Process one batch of due deletions"""
+    db = get_database()
+    now = datetime.utcnow()
+
+    due = await db.media_deletions.find(
+        {"next_attempt_at": {"$lte": now}},
+        {"_id": 1}
+    ).sort("next_attempt_at", 1).limit(settings.MEDIA_DELETE_BATCH_SIZE).to_list(
+        length=settings.MEDIA_DELETE_BATCH_SIZE
+    )
+    if not due:
+        return
+
+    # Claim the batch so concurrent workers don't delete the same assets
+    claim = str(ObjectId())
+    await db.media_deletions.update_many(
+        {"_id": {"$in": [d["_id"] for d in due]}, "next_attempt_at": {"$lte": now}},
+        {"$set": {
+            "claim": claim,
+            "next_attempt_at": now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        }}
+    )
+    entries = await db.media_deletions.find({"claim": claim}).to_list(length=len(due))
+
+    storage = get_storage()
+    results = await asyncio.gather(*(_delete(storage, entry) for entry in entries))
+
+    done = []
+    for entry, result in zip(entries, results):
+        if result.get("success"):
+            done.append(entry["_id"])
+            continue
+        attempts = entry["attempts"] + 1
+        await db.media_deletions.update_one(
+            {"_id": entry["_id"]},
+            {
+                "$set": {
+                    "attempts": attempts,
+                    "next_attempt_at": datetime.utcnow() + _backoff(attempts),
+                    "last_error": result.get("error") or str(result.get("result"))
+                },
+                "$unset": {"claim": ""}
+            }
+        )
+
+    if done:
+        await db.media_deletions.delete_many({"_id": {"$in": done}})
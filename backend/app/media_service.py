@@ -0,0 +1,72 @@
+"""
+Async wrappers around the blocking Cloudinary SDK calls in cloudinary_service
+
+The SDK does synchronous HTTP, so calling it from a request handler stalls
+the whole event loop for the duration of the upload. These helpers run the
+calls in a bounded thread pool, cap how many run at once and give up after
+MEDIA_TIMEOUT_SECONDS, returning the same result dicts as the sync versions.
+"""
+import asyncio
+import functools
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+from . import cloudinary_service
+from .config import settings
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.MEDIA_MAX_CONCURRENCY,
+    thread_name_prefix="media"
+)
+_semaphore = asyncio.Semaphore(settings.MEDIA_MAX_CONCURRENCY)
+
+
+def _release(future: asyncio.Future):
+    _semaphore.release()
+    if not future.cancelled():
+        future.exception()  # A call that outlived its timeout has nobody else to report to
+
+
+async def _run(func, *args, **kwargs) -> dict:
+    """Run a blocking cloudinary_service call in the media pool with a timeout"""
+    loop = asyncio.get_running_loop()
+    await _semaphore.acquire()
+    try:
+        future = loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    except BaseException:
+        _semaphore.release()
+        raise
+    # A timed-out call keeps its thread busy, so its slot is only freed once
+    # the thread actually finishes; the cap then bounds stuck calls too
+    future.add_done_callback(_release)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=settings.MEDIA_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "error": f"Media operation timed out after {settings.MEDIA_TIMEOUT_SECONDS}s"
+        }
+
+
+async def upload_video(file_path: str, public_id: str = None, folder: str = "feastverse/reels") -> dict:
+    return await _run(cloudinary_service.upload_video, file_path, public_id=public_id, folder=folder)
+
+
+async def upload_image(file_path: str, public_id: str = None, folder: str = "feastverse/images") -> dict:
+    return await _run(cloudinary_service.upload_image, file_path, public_id=public_id, folder=folder)
+
+
+async def delete_video(public_id: str) -> dict:
+    return await _run(cloudinary_service.delete_video, public_id)
+
+
+async def save_upload(source: BinaryIO, destination: BinaryIO):
+    """Copy an uploaded file to disk without blocking the event loop"""
+    # Not in the media pool: spooling must not queue behind slow Cloudinary calls
+    await asyncio.to_thread(shutil.copyfileobj, source, destination)
+
+
+def shutdown():
+    """Stop accepting new media work; in-flight calls finish in the background"""
+    _executor.shutdown(wait=False)
@@ -0,0 +1,55 @@
+"""
+Menu items collection helpers
+
+Menu items live in their own `menu_items` collection (keyed by the item id,
+indexed by restaurant_id) instead of an array embedded in the restaurant,
+so editing one item is a single small document write. The restaurant keeps
+only what search needs: `menu_item_names` for the text index and the item
+trigrams in `search_ngrams`.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from .search import restaurant_ngrams
+
+
+def serialize_menu_item(item: dict) -> dict:
+    return {
+        "id": item["_id"],
+        "name": item["name"],
+        "price": item["price"],
+        "description": item.get("description"),
+        "image": item.get("image"),
+        "available": item.get("available", True),
+        "restaurant_id": item["restaurant_id"]
+    }
+
+
+async def fetch_menus(db, restaurant_ids: Iterable[str]) -> Dict[str, List[dict]]:
+    """Menus for several restaurants in one query, keyed by restaurant id"""
+    restaurant_ids = list(restaurant_ids)
+    menus = defaultdict(list)
+    if not restaurant_ids:
+        return menus
+    cursor = db.menu_items.find({"restaurant_id": {"$in": restaurant_ids}}).sort(
+        [("restaurant_id", 1), ("created_at", 1), ("_id", 1)]
+    )
+    async for item in cursor:
+        menus[item["restaurant_id"]].append(item)
+    return menus
+
+
+async def refresh_search_fields(db, restaurant: dict):
+    """Recompute a restaurant's menu_item_names and search_ngrams from its menu"""
+    restaurant_id = str(restaurant["_id"])
+    names = [
+        item["name"]
+        async for item in db.menu_items.find({"restaurant_id": restaurant_id}, {"name": 1})
+    ]
+    await db.restaurants.update_one(
+        {"_id": restaurant["_id"]},
+        {"$set": {
+            "menu_item_names": sorted(set(names)),
+            "search_ngrams": restaurant_ngrams(restaurant["name"], restaurant["cuisine"], names)
+        }}
+    )
@@ -0,0 +1,193 @@
+"""
+Idempotent data migrations, run on startup after ensure_indexes()
+
+Each migration only touches documents still in the old shape, so running
+them on every boot (or from several workers at once) is safe.
+"""
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .database import REVIEW_UNIQUE_INDEX, get_database
+from .search import restaurant_ngrams
+
+
+async def migrate_liked_reels():
+    """Move users.liked_reels arrays into the reel_likes collection"""
+    db = get_database()
+    migrated = 0
+
+    async for user in db.users.find({"liked_reels": {"$exists": True}}, {"liked_reels": 1}):
+        user_id = str(user["_id"])
+        inserts = [
+            InsertOne({"user_id": user_id, "reel_id": reel_id, "created_at": datetime.utcnow()})
+            for reel_id in set(user.get("liked_reels", []))
+        ]
+        if inserts:
+            try:
+                await db.reel_likes.bulk_write(inserts, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate keys mean the like was already migrated
+                if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+
+        await db.users.update_one({"_id": user["_id"]}, {"$unset": {"liked_reels": ""}})
+        migrated += 1
+
+    if migrated:
+        print(f"🔧 Migrated liked_reels for {migrated} users")
+
+
+async def backfill_search_ngrams():
+    """Compute search_ngrams for restaurants created before fuzzy search existed"""
+    db = get_database()
+    updates = []
+    async for r in db.restaurants.find(
+        {"search_ngrams": {"$exists": False}},
+        {"name": 1, "cuisine": 1, "menu_items.name": 1}
+    ):
+        grams = restaurant_ngrams(
+            r.get("name", ""),
+            r.get("cuisine", ""),
+            [item["name"] for item in r.get("menu_items", [])]
+        )
+        updates.append(UpdateOne({"_id": r["_id"]}, {"$set": {"search_ngrams": grams}}))
+
+    if updates:
+        await db.restaurants.bulk_write(updates, ordered=False)
+        print(f"🔧 Backfilled search_ngrams for {len(updates)} restaurants")
+
+
+async def split_menu_items():
+    """Move embedded restaurants.menu_items arrays into the menu_items collection"""
+    db = get_database()
+    migrated = 0
+
+    async for r in db.restaurants.find({"menu_items": {"$exists": True}}, {"menu_items": 1, "created_at": 1}):
+        restaurant_id = str(r["_id"])
+        base = r.get("created_at") or datetime.utcnow()
+        items = r.get("menu_items", [])
+        inserts = [
+            # Offset created_at so the menu keeps its original order
+            InsertOne({
+                "_id": item["id"],
+                "restaurant_id": restaurant_id,
+                "name": item["name"],
+                "price": item["price"],
+                "description": item.get("description"),
+                "image": item.get("image"),
+                "available": item.get("available", True),
+                "created_at": base + timedelta(milliseconds=i),
+                "updated_at": None
+            })
+            for i, item in enumerate(items)
+        ]
+        if inserts:
+            try:
+                await db.menu_items.bulk_write(inserts, ordered=False)
+            except BulkWriteError as e:
+                if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+
+        await db.restaurants.update_one(
+            {"_id": r["_id"]},
+            {
+                "$set": {"menu_item_names": sorted({item["name"] for item in items})},
+                "$unset": {"menu_items": ""}
+            }
+        )
+        migrated += 1
+
+    if migrated:
+        print(f"🔧 Moved menus of {migrated} restaurants into menu_items")
+
+
+async def backfill_restaurant_followers():
+    """Build restaurant_followers edges and counters from the users' follow arrays"""
+    db = get_database()
+    pending = [
+        str(r["_id"])
+        async for r in db.restaurants.find({"followers_count": {"$exists": False}}, {"_id": 1})
+    ]
+    if not pending:
+        return
+
+    kinds = {"follow": "followed_restaurants", "subscribe": "subscribed_restaurants"}
+    for kind, array_field in kinds.items():
+        inserts = []
+        async for user in db.users.find({array_field: {"$in": pending}}, {array_field: 1}):
+            inserts.extend(
+                InsertOne({
+                    "user_id": str(user["_id"]),
+                    "restaurant_id": restaurant_id,
+                    "kind": kind,
+                    "created_at": datetime.utcnow()
+                })
+                for restaurant_id in set(user[array_field]) & set(pending)
+            )
+        if inserts:
+            try:
+                await db.restaurant_followers.bulk_write(inserts, ordered=False)
+            except BulkWriteError as e:
+                if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+
+    counts = {}
+    pipeline = [
+        {"$match": {"restaurant_id": {"$in": pending}}},
+        {"$group": {"_id": {"restaurant_id": "$restaurant_id", "kind": "$kind"}, "count": {"$sum": 1}}}
+    ]
+    async for row in db.restaurant_followers.aggregate(pipeline):
+        counts[(row["_id"]["restaurant_id"], row["_id"]["kind"])] = row["count"]
+
+    await db.restaurants.bulk_write([
+        UpdateOne(
+            {"_id": ObjectId(restaurant_id)},
+            {"$set": {
+                "followers_count": counts.get((restaurant_id, "follow"), 0),
+                "subscribers_count": counts.get((restaurant_id, "subscribe"), 0)
+            }}
+        )
+        for restaurant_id in pending
+    ], ordered=False)
+    print(f"🔧 Backfilled follower counts for {len(pending)} restaurants")
+
+
+async def dedupe_reviews():
+    """Drop duplicate (user, restaurant) reviews, keeping the first, then build the unique index"""
+    db = get_database()
+    if REVIEW_UNIQUE_INDEX in await db.reviews.index_information():
+        return
+
+    pipeline = [
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "restaurant_id": "$restaurant_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    duplicates = []
+    async for group in db.reviews.aggregate(pipeline, allowDiskUse=True):
+        duplicates.extend(group["ids"][1:])
+    if duplicates:
+        # Rating counters are corrected by the reconcile_restaurant_ratings job
+        await db.reviews.delete_many({"_id": {"$in": duplicates}})
+        print(f"🔧 Removed {len(duplicates)} duplicate reviews")
+
+    await db.reviews.create_index(
+        [("user_id", ASCENDING), ("restaurant_id", ASCENDING)],
+        unique=True, name=REVIEW_UNIQUE_INDEX
+    )
+
+
+async def run_migrations():
+    await migrate_liked_reels()
+    # Backfill reads embedded menus, so it runs before they are split out
+    await backfill_search_ngrams()
+    await split_menu_items()
+    await backfill_restaurant_followers()
+    await dedupe_reviews()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from bson import ObjectId
 
@@ -42,30 +42,44 @@ class UserDB(MongoBaseModel):
     phone: Optional[str] = None
     followed_restaurants: List[str] = []
     subscribed_restaurants: List[str] = []
-    liked_reels: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
 
 
-# Restaurant Model
+# Menu item Model (menu_items collection, keyed by the item id)
 class MenuItemDB(BaseModel):
-    id: str
+    id: str = Field(alias="_id")
+    restaurant_id: str
     name: str
     price: float
     description: Optional[str] = None
     image: Optional[str] = None
     available: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
 
 
+# Restaurant Model
 class RestaurantDB(MongoBaseModel):
     name: str
     cuisine: str
-    rating: float = 0.0
+    rating: float = 0.0  # Derived from rating_sum / rating_count
+    rating_sum: int = 0
+    rating_count: int = 0
+    rating_histogram: Dict[str, int] = {}  # Review count per star, keyed "1".."5"
+    recent_ratings: Optional[dict] = None  # Rolled up by rollup_recent_ratings
     delivery_fee: float
     eta_mins: int
     image: str
     description: Optional[str] = None
-    menu_items: List[MenuItemDB] = []
+    location: Optional[dict] = None  # GeoJSON Point: {"type": "Point", "coordinates": [lng, lat]}
+    menu_item_names: List[str] = []  # Denormalized for the search text index
+    search_ngrams: List[str] = []  # Trigrams of name, cuisine and menu item names
+    followers_count: int = 0  # Maintained with $inc alongside restaurant_followers
+    subscribers_count: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
 
@@ -76,11 +90,43 @@ class ReelDB(MongoBaseModel):
     restaurant_id: Optional[str] = None
     title: str
     video_url: str
+    public_id: Optional[str] = None  # Storage id of the video, used for cleanup
     thumbnail_url: Optional[str] = None
     likes_count: int = 0
+    views: int = 0
+    unique_viewers: int = 0
+    trending_score: float = 0.0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Reel like Model (one document per user/reel pair)
+class ReelLikeDB(MongoBaseModel):
+    user_id: str
+    reel_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+# Restaurant follower Model (one document per user/restaurant/kind edge)
+class RestaurantFollowerDB(MongoBaseModel):
+    user_id: str
+    restaurant_id: str
+    kind: str  # follow, subscribe
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Reel ingest job Model
+class ReelJobDB(MongoBaseModel):
+    user_id: str
+    title: str
+    restaurant_id: Optional[str] = None
+    file_path: str
+    status: str = "queued"  # queued, processing, completed, failed
+    reel_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
+
+
 # Story Model
 class StoryDB(MongoBaseModel):
     user_id: str
@@ -114,6 +160,7 @@ class OrderDB(MongoBaseModel):
     total: float
     eta_mins: int
     status: str = "preparing"  # preparing, pickup, on the way, delivered
+    status_history: List[dict] = []  # [{"status", "at"}], one entry per transition
     address: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
@@ -0,0 +1,138 @@
+"""
+Order status events
+
+update_order_status publishes every transition here, and /orders/{id}/events
+pushes them to clients over Server-Sent Events or a WebSocket, so active
+orders no longer have to be polled. Open streams subscribe to an in-process
+OrderEventBus; a broker carries events between workers:
+
+- MongoOrderEventBroker tails a small capped collection through the same
+  CappedCollectionBroadcaster as the cache invalidation bus.
+- InMemoryOrderEventBroker delivers within the process only, for tests and
+  single-worker development (ORDER_EVENTS_BACKEND=memory).
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, Set
+
+from .broadcast import CappedCollectionBroadcaster
+from .config import settings
+
+ORDER_EVENTS_COLLECTION = "order_events"
+
+# Streams close once an order reaches one of these
+TERMINAL_STATUSES = {"delivered"}
+
+# Events buffered per open stream before a slow client starts missing them
+_QUEUE_SIZE = 100
+
+
+class OrderEventBus:
+    """Fans events out to the open streams of this worker, by order id"""
+
+    def __init__(self):
+        self._queues: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, order_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self._queues[order_id].add(queue)
+        return queue
+
+    def unsubscribe(self, order_id: str, queue: asyncio.Queue):
+        queues = self._queues.get(order_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[order_id]
+
+    def deliver(self, event: dict):
+        for queue in self._queues.get(event["order_id"], ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+
+class InMemoryOrderEventBroker:
+    """Delivers events to this process only"""
+
+    def __init__(self, bus: OrderEventBus):
+        self.bus = bus
+
+    async def publish(self, event: dict):
+        self.bus.deliver(event)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class MongoOrderEventBroker:
+    """Broadcasts events to every worker through a tailed capped collection"""
+
+    def __init__(self, bus: OrderEventBus):
+        self.bus = bus
+        self._broadcaster = CappedCollectionBroadcaster(ORDER_EVENTS_COLLECTION, bus.deliver)
+
+    async def publish(self, event: dict):
+        # Local streams get the event directly; the listener skips our own messages
+        self.bus.deliver(event)
+        await self._broadcaster.publish(event)
+
+    async def start(self):
+        await self._broadcaster.start()
+
+    async def stop(self):
+        await self._broadcaster.stop()
+
+
+order_event_bus = OrderEventBus()
+
+if settings.ORDER_EVENTS_BACKEND == "memory":
+    order_event_broker = InMemoryOrderEventBroker(order_event_bus)
+else:
+    order_event_broker = MongoOrderEventBroker(order_event_bus)
+
+
+def status_event(order: dict) -> dict:
+    """The event payload describing an order's current status"""
+    return {
+        "order_id": str(order["_id"]),
+        "status": order["status"],
+        "updated_at": (order.get("updated_at") or order["created_at"]).isoformat()
+    }
+
+
+async def publish_order_status(order: dict):
+    """Push an order's new status to every stream following it"""
+    await order_event_broker.publish(status_event(order))
+
+
+async def follow_order(order_id: str, load_order):
+    """
+    Yield status events for an order until it reaches a terminal status
+
+    Subscribes before `load_order()` reads the current state, so a transition
+    that lands in between is not lost. Yields None as a keep-alive whenever
+    ORDER_EVENTS_HEARTBEAT_SECONDS pass without an event.
+    """
+    queue = order_event_bus.subscribe(order_id)
+    try:
+        order = await load_order()
+        event = status_event(order)
+        yield event
+        last_status = event["status"]
+
+        while last_status not in TERMINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.ORDER_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event["status"] != last_status:
+                last_status = event["status"]
+                yield event
+    finally:
+        order_event_bus.unsubscribe(order_id, queue)
@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(doc: dict, field: str = "created_at") -> str:
+    """Encode the (field, _id) position of a document as an opaque cursor"""
+    value = doc[field]
+    if isinstance(value, datetime):
+        payload = {"v": value.isoformat(), "id": str(doc["_id"])}
+    else:
+        payload = {"v": value, "n": 1, "id": str(doc["_id"])}  # Numeric sort key (e.g. rating)
+    if not isinstance(doc["_id"], ObjectId):
+        payload["s"] = 1  # String _id (e.g. menu items), not an ObjectId
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor produced by encode_cursor into (value, _id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        doc_id = payload["id"] if payload.get("s") else ObjectId(payload["id"])
+        value = payload["v"] if payload.get("n") else datetime.fromisoformat(payload["v"])
+        return value, doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: str, field: str = "created_at", descending: bool = True) -> dict:
+    """
+    Build the query clause that resumes a (field, _id) ordered scan after a cursor
+    
+    Combined with a compound index on (field, _id) this seeks straight to the
+    next page instead of walking and discarding every earlier document.
+    """
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: doc_id}}
+        ]
+    }
+
+
+def keyset_sort(field: str = "created_at", descending: bool = True) -> List[tuple]:
+    """Sort specification matching keyset_filter"""
+    direction = -1 if descending else 1
+    return [(field, direction), ("_id", direction)]
+
+
+def next_cursor(page: List[dict], limit: int, field: str = "created_at") -> Optional[str]:
+    """Cursor for the page after `page`, or None when this was the last one"""
+    if limit <= 0 or len(page) < limit:
+        return None
+    return encode_cursor(page[-1], field)
@@ -0,0 +1,144 @@
+"""
+Incrementally maintained restaurant ratings
+
+Restaurants carry `rating_sum`, `rating_count` and a per-star
+`rating_histogram`, which review writes adjust with $inc; `rating` is
+derived from them instead of re-reading the restaurant's reviews.
+reconcile_restaurant_ratings repairs any drift, and rollup_recent_ratings
+periodically stores the last RATING_STATS_WINDOW_DAYS of reviews as
+`recent_ratings`, so GET /restaurants/{id}/rating-stats is one document read.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateMany, UpdateOne
+
+from .cache import invalidate_restaurant, invalidate_restaurants
+from .config import settings
+from .database import get_database
+
+STARS = ["1", "2", "3", "4", "5"]
+
+
+def average_rating(rating_sum: float, rating_count: int) -> float:
+    return round(rating_sum / rating_count, 1) if rating_count > 0 else 0.0
+
+
+async def apply_review(db, restaurant_id: str, rating: int, delta: int = 1):
+    """Add (delta=1) or remove (delta=-1) one review's rating from its restaurant"""
+    counters = await db.restaurants.find_one_and_update(
+        {"_id": ObjectId(restaurant_id)},
+        {"$inc": {
+            "rating_sum": rating * delta,
+            "rating_count": delta,
+            f"rating_histogram.{rating}": delta
+        }},
+        projection={"rating_sum": 1, "rating_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not counters:
+        return
+
+    # Guarded on the counters we just produced: if another review landed in
+    # between, its own update sets the newer rating and this one is skipped
+    await db.restaurants.update_one(
+        {
+            "_id": counters["_id"],
+            "rating_sum": counters["rating_sum"],
+            "rating_count": counters["rating_count"]
+        },
+        {"$set": {"rating": average_rating(counters["rating_sum"], counters["rating_count"])}}
+    )
+    await invalidate_restaurant(restaurant_id)
+
+
+async def _rating_totals(db, match: dict = None) -> dict:
+    """restaurant id -> (rating sum, review count, histogram) over the matching reviews"""
+    totals = defaultdict(lambda: [0, 0, {}])
+    pipeline = [
+        {"$group": {
+            "_id": {"restaurant_id": "$restaurant_id", "rating": "$rating"},
+            "count": {"$sum": 1}
+        }}
+    ]
+    if match:
+        pipeline.insert(0, {"$match": match})
+    async for row in db.reviews.aggregate(pipeline):
+        rating, count = row["_id"]["rating"], row["count"]
+        entry = totals[row["_id"]["restaurant_id"]]
+        entry[0] += rating * count
+        entry[1] += count
+        entry[2][str(rating)] = count
+    return totals
+
+
+async def reconcile_restaurant_ratings():
+    """Recompute rating counters from the reviews and fix restaurants that drifted"""
+    db = get_database()
+
+    # Snapshot the counters before aggregating: any review written after this
+    # point changes them, so the guarded update below skips that restaurant
+    restaurants = await db.restaurants.find(
+        {},
+        {"rating": 1, "rating_sum": 1, "rating_count": 1, "rating_histogram": 1}
+    ).to_list(length=None)
+    actual = await _rating_totals(db)
+
+    updates, changed = [], []
+    for r in restaurants:
+        rating_sum, rating_count, histogram = actual.get(str(r["_id"]), (0, 0, {}))
+        rating = average_rating(rating_sum, rating_count)
+        stored_histogram = {k: v for k, v in (r.get("rating_histogram") or {}).items() if v}
+        current = (r.get("rating_sum"), r.get("rating_count"), r.get("rating"), stored_histogram)
+        if current != (rating_sum, rating_count, rating, histogram):
+            updates.append(UpdateOne(
+                {
+                    "_id": r["_id"],
+                    "rating_sum": r.get("rating_sum"),
+                    "rating_count": r.get("rating_count")
+                },
+                {"$set": {
+                    "rating_sum": rating_sum,
+                    "rating_count": rating_count,
+                    "rating": rating,
+                    "rating_histogram": histogram
+                }}
+            ))
+            changed.append(str(r["_id"]))
+
+    if updates:
+        result = await db.restaurants.bulk_write(updates, ordered=False)
+        await invalidate_restaurants(changed)
+        print(f"🔧 Reconciled ratings on {result.modified_count} restaurants")
+
+
+async def rollup_recent_ratings():
+    """Store each restaurant's review count, average and histogram over the recent window"""
+    db = get_database()
+    now = datetime.utcnow()
+    since = now - timedelta(days=settings.RATING_STATS_WINDOW_DAYS)
+    recent = await _rating_totals(db, {"created_at": {"$gte": since}})
+
+    updates = [
+        UpdateOne(
+            {"_id": ObjectId(restaurant_id)},
+            {"$set": {"recent_ratings": {
+                "count": rating_count,
+                "average": average_rating(rating_sum, rating_count),
+                "histogram": histogram,
+                "updated_at": now
+            }}}
+        )
+        for restaurant_id, (rating_sum, rating_count, histogram) in recent.items()
+        if ObjectId.is_valid(restaurant_id)
+    ]
+    # Restaurants whose last recent review has aged out of the window
+    stale = {"recent_ratings.count": {"$gt": 0}}
+    if recent:
+        stale["_id"] = {"$nin": [ObjectId(i) for i in recent if ObjectId.is_valid(i)]}
+    updates.append(UpdateMany(
+        stale,
+        {"$set": {"recent_ratings": {"count": 0, "average": 0.0, "histogram": {}, "updated_at": now}}}
+    ))
+    await db.restaurants.bulk_write(updates, ordered=False)
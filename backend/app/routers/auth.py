@@ -3,14 +3,13 @@ from datetime import datetime
 from bson import ObjectId
 import random
 import os
-import shutil
 import tempfile
 
 from .. import schemas, auth
 from ..database import get_database
 from ..models import UserDB
 from ..email import send_welcome_email, send_username_change_email, send_profile_update_email
-from ..cloudinary_service import upload_image
+from ..media_service import upload_image, save_upload
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -258,11 +257,11 @@ async def upload_avatar(
     # Save to a temporary file
     suffix = os.path.splitext(file.filename)[1] or ".jpg"
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        shutil.copyfileobj(file.file, tmp)
+        await save_upload(file.file, tmp)
         tmp_path = tmp.name
 
     try:
-        result = upload_image(tmp_path, folder="feastverse/avatars")
+        result = await upload_image(tmp_path, folder="feastverse/avatars")
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=f"Failed to upload image: {result.get('error')}")
 
@@ -1,68 +1,37 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from .. import schemas, auth
 from ..database import get_database
 from ..models import OrderDB, OrderItemDB
+from ..order_events import follow_order, publish_order_status
+from ..pagination import NEXT_CURSOR_HEADER, keyset_filter, keyset_sort, next_cursor
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-
-@router.get("/", response_model=List[schemas.Order])
-async def get_my_orders(current_user: dict = Depends(auth.get_current_user)):
-    """Get current user's orders"""
-    db = get_database()
-    orders = await db.orders.find(
-        {"user_id": str(current_user["_id"])}
-    ).sort("created_at", -1).to_list(length=100)
-    
-    return [
-        {
-            "id": str(order["_id"]),
-            "user_id": order["user_id"],
-            "total": order["total"],
-            "eta_mins": order["eta_mins"],
-            "status": order["status"],
-            "address": order.get("address"),
-            "created_at": order["created_at"],
-            "items": [
-                {
-                    "id": idx,
-                    "order_id": str(order["_id"]),
-                    "menu_item_id": item["menu_item_id"],
-                    "quantity": item["quantity"],
-                    "price": item["price"]
-                }
-                for idx, item in enumerate(order["items"])
-            ]
-        }
-        for order in orders
-    ]
+# Status progression
+STATUS_FLOW = {
+    "preparing": "pickup",
+    "pickup": "on the way",
+    "on the way": "delivered"
+}
 
 
-@router.get("/{order_id}", response_model=schemas.Order)
-async def get_order(
-    order_id: str,
-    current_user: dict = Depends(auth.get_current_user)
-):
-    """Get a specific order"""
-    db = get_database()
-    order = await db.orders.find_one({
-        "_id": ObjectId(order_id),
-        "user_id": str(current_user["_id"])
-    })
-    
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
+def _serialize_order(order: dict) -> dict:
+    """Build the schemas.Order payload from an order document"""
     return {
         "id": str(order["_id"]),
         "user_id": order["user_id"],
+        "restaurant_id": order.get("restaurant_id") or None,
         "total": order["total"],
         "eta_mins": order["eta_mins"],
         "status": order["status"],
+        "status_history": order.get("status_history", []),
         "address": order.get("address"),
         "created_at": order["created_at"],
         "items": [
@@ -70,6 +39,7 @@ async def get_order(
                 "id": idx,
                 "order_id": str(order["_id"]),
                 "menu_item_id": item["menu_item_id"],
+                "name": item["name"],
                 "quantity": item["quantity"],
                 "price": item["price"]
             }
@@ -78,6 +48,173 @@ async def get_order(
     }
 
 
+async def _price_items(db, items: List[schemas.OrderItemCreate]):
+    """
+    Validate the ordered menu items and price them from the menu
+    
+    One $in query loads every item; returns (restaurant, order items, total).
+    """
+    item_ids = list({item.menu_item_id for item in items})
+    menu = {
+        m["_id"]: m
+        async for m in db.menu_items.find(
+            {"_id": {"$in": item_ids}},
+            {"restaurant_id": 1, "name": 1, "price": 1, "available": 1}
+        )
+    }
+    
+    missing = [i for i in item_ids if i not in menu]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Menu items not found: {', '.join(missing)}")
+    unavailable = [menu[i]["name"] for i in item_ids if not menu[i].get("available", True)]
+    if unavailable:
+        raise HTTPException(status_code=400, detail=f"Menu items unavailable: {', '.join(unavailable)}")
+    restaurant_ids = {m["restaurant_id"] for m in menu.values()}
+    if len(restaurant_ids) > 1:
+        raise HTTPException(status_code=400, detail="All items must be from the same restaurant")
+    
+    restaurant_id = restaurant_ids.pop()
+    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)}, {"delivery_fee": 1})
+    if not restaurant:
+        raise HTTPException(status_code=400, detail="Restaurant not found")
+    
+    order_items = [
+        OrderItemDB(
+            menu_item_id=item.menu_item_id,
+            name=menu[item.menu_item_id]["name"],
+            quantity=item.quantity,
+            price=menu[item.menu_item_id]["price"]
+        )
+        for item in items
+    ]
+    subtotal = sum(i.price * i.quantity for i in order_items)
+    total = round(subtotal + restaurant.get("delivery_fee", 0), 2)
+    return restaurant_id, order_items, total
+
+
+@router.get("/", response_model=List[schemas.Order])
+async def get_my_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """
+    Get current user's orders (newest first)
+    
+    Pass the X-Next-Cursor header of the previous page as `cursor` to page
+    further back in history.
+    """
+    db = get_database()
+    query = {"user_id": str(current_user["_id"])}
+    if cursor:
+        query.update(keyset_filter(cursor))
+    find = db.orders.find(query).sort(keyset_sort())
+    if not cursor and skip:
+        find = find.skip(skip)
+    orders = await find.limit(limit).to_list(length=limit)
+    
+    page_cursor = next_cursor(orders, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    
+    return [_serialize_order(order) for order in orders]
+
+
+@router.get("/{order_id}", response_model=schemas.Order)
+async def get_order(
+    order_id: str,
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Get a specific order"""
+    db = get_database()
+    order = await db.orders.find_one({
+        "_id": ObjectId(order_id),
+        "user_id": str(current_user["_id"])
+    })
+    
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    return _serialize_order(order)
+
+
+def _order_status_loader(db, order_id: str, user_id: str):
+    """Reads the status of one of the user's orders for follow_order (404 if it isn't theirs)"""
+    async def load():
+        order = None
+        if ObjectId.is_valid(order_id):
+            order = await db.orders.find_one(
+                {"_id": ObjectId(order_id), "user_id": user_id},
+                {"status": 1, "created_at": 1, "updated_at": 1}
+            )
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return order
+    return load
+
+
+@router.get("/{order_id}/events")
+async def stream_order_events(
+    order_id: str,
+    token: Optional[str] = None,
+    user_id: Optional[str] = Depends(auth.get_optional_user_id)
+):
+    """
+    Server-Sent Events stream of an order's status, ending once it is delivered
+    
+    Sends the current status first, then one `status` event per transition.
+    EventSource can't set headers, so the access token may be passed as `token`.
+    """
+    if user_id is None:
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        user_id = auth.verify_token(token)
+    
+    events = follow_order(order_id, _order_status_loader(get_database(), order_id, user_id))
+    # Read the first event here so a missing order is a plain 404
+    first = await anext(events)
+    
+    async def body():
+        yield f"event: status\ndata: {json.dumps(first)}\n\n"
+        async for event in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{order_id}/events")
+async def order_events_websocket(websocket: WebSocket, order_id: str, token: Optional[str] = None):
+    """WebSocket variant of the order status stream; authenticate with `token`"""
+    try:
+        user_id = auth.verify_token(token or "")
+        events = follow_order(order_id, _order_status_loader(get_database(), order_id, user_id))
+        first = await anext(events)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    try:
+        await websocket.send_json(first)
+        async for event in events:
+            # Keep-alives also notice clients that went away
+            await websocket.send_json(event if event is not None else {"keepalive": True})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await events.aclose()
+
+
 @router.post("/", response_model=schemas.Order)
 async def create_order(
     order: schemas.OrderCreate,
@@ -86,98 +223,83 @@ async def create_order(
     """Create a new order"""
     db = get_database()
     
-    # Verify all menu items exist
-    for item in order.items:
-        # This is a simplified check - in production you'd verify the menu item exists
-        pass
+    restaurant_id, order_items, total = await _price_items(db, order.items)
     
-    # Create order
+    now = datetime.utcnow()
     order_data = OrderDB(
         user_id=str(current_user["_id"]),
-        restaurant_id="",  # Can be extracted from menu items
-        items=[OrderItemDB(**item.dict()) for item in order.items],
-        total=order.total,
+        restaurant_id=restaurant_id,
+        items=order_items,
+        total=total,
         eta_mins=order.eta_mins,
         address=order.address,
-        status="preparing"
-    )
-    
-    result = await db.orders.insert_one(
-        order_data.dict(by_alias=True, exclude={"id"})
+        status="preparing",
+        status_history=[{"status": "preparing", "at": now}],
+        created_at=now
     )
+    doc = order_data.dict(by_alias=True, exclude={"id"})
+    result = await db.orders.insert_one(doc)
     
-    created_order = await db.orders.find_one({"_id": result.inserted_id})
-    
-    return {
-        "id": str(created_order["_id"]),
-        "user_id": created_order["user_id"],
-        "total": created_order["total"],
-        "eta_mins": created_order["eta_mins"],
-        "status": created_order["status"],
-        "address": created_order.get("address"),
-        "created_at": created_order["created_at"],
-        "items": [
-            {
-                "id": idx,
-                "order_id": str(created_order["_id"]),
-                "menu_item_id": item["menu_item_id"],
-                "quantity": item["quantity"],
-                "price": item["price"]
-            }
-            for idx, item in enumerate(created_order["items"])
-        ]
-    }
+    doc["_id"] = result.inserted_id
+    return _serialize_order(doc)
 
 
-@router.patch("/{order_id}/status")
+@router.patch("/{order_id}/status", response_model=schemas.Order)
 async def update_order_status(
     order_id: str,
-    current_user: dict = Depends(auth.get_current_user)
+    expected_status: Optional[str] = None,
+    user_id: str = Depends(auth.get_current_user_id)
 ):
-    """Advance order status to next stage"""
-    db = get_database()
+    """
+    Advance order status to next stage
     
-    order = await db.orders.find_one({
-        "_id": ObjectId(order_id),
-        "user_id": str(current_user["_id"])
-    })
+    The transition is one conditional find_one_and_update: the next status is
+    computed from the stored one inside the update, so concurrent advances
+    each move exactly one step. Pass `expected_status` to only advance from
+    that status (409 otherwise), which makes retries and double-clicks safe.
+    """
+    db = get_database()
     
-    if not order:
+    if not ObjectId.is_valid(order_id):
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Status progression
-    status_flow = {
-        "preparing": "pickup",
-        "pickup": "on the way",
-        "on the way": "delivered"
-    }
+    query = {"_id": ObjectId(order_id), "user_id": user_id, "status": {"$in": list(STATUS_FLOW)}}
+    if expected_status is not None:
+        query["status"] = expected_status if expected_status in STATUS_FLOW else {"$in": []}
     
-    current_status = order["status"]
-    if current_status in status_flow:
-        new_status = status_flow[current_status]
-        await db.orders.update_one(
-            {"_id": ObjectId(order_id)},
-            {"$set": {"status": new_status, "updated_at": datetime.utcnow()}}
-        )
+    now = datetime.utcnow()
+    next_status = {"$switch": {
+        "branches": [
+            {"case": {"$eq": ["$status", current]}, "then": following}
+            for current, following in STATUS_FLOW.items()
+        ],
+        "default": "$status"
+    }}
+    updated_order = await db.orders.find_one_and_update(
+        query,
+        [{"$set": {
+            "status": next_status,
+            "updated_at": now,
+            "status_history": {"$concatArrays": [
+                {"$ifNull": ["$status_history", []]},
+                [{"status": next_status, "at": now}]
+            ]}
+        }}],
+        return_document=ReturnDocument.AFTER
+    )
     
-    updated_order = await db.orders.find_one({"_id": ObjectId(order_id)})
+    if updated_order is None:
+        # Only the failure path reads the order, to tell why nothing changed
+        order = await db.orders.find_one({"_id": ObjectId(order_id), "user_id": user_id})
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        if expected_status is not None and order["status"] != expected_status:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Order status is '{order['status']}', not '{expected_status}'"
+            )
+        # Already delivered: nothing left to advance
+        return _serialize_order(order)
     
-    return {
-        "id": str(updated_order["_id"]),
-        "user_id": updated_order["user_id"],
-        "total": updated_order["total"],
-        "eta_mins": updated_order["eta_mins"],
-        "status": updated_order["status"],
-        "address": updated_order.get("address"),
-        "created_at": updated_order["created_at"],
-        "items": [
-            {
-                "id": idx,
-                "order_id": str(updated_order["_id"]),
-                "menu_item_id": item["menu_item_id"],
-                "quantity": item["quantity"],
-                "price": item["price"]
-            }
-            for idx, item in enumerate(updated_order["items"])
-        ]
-    }
+    await publish_order_status(updated_order)
+    return _serialize_order(updated_order)
@@ -1,145 +1,229 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response, status
 from bson import ObjectId
-import os
-import shutil
-from pathlib import Path
-import tempfile
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from .. import schemas, auth
 from ..database import get_database
-from ..models import ReelDB
-from ..config import settings
-from ..cloudinary_service import upload_video, delete_video, generate_video_thumbnail
+from ..models import ReelLikeDB
+from ..feed import read_timeline
+from ..pagination import NEXT_CURSOR_HEADER, keyset_filter, keyset_sort, next_cursor
+from ..ingest import spool_path, submit_reel_job
+from ..media_outbox import enqueue_deletion
+from ..media_service import save_upload
+from ..trending import engagement_score
+from ..users import fetch_users
+from ..views import record_view
 
 router = APIRouter(prefix="/reels", tags=["reels"])
 
+# Only the author fields schemas.Reel exposes
+AUTHOR_PROJECTION = {"name": 1, "username": 1, "email": 1, "picture": 1}
+
+# The unique-viewer sketch is internal and too large to ship with every reel
+REEL_PROJECTION = {"viewers_hll": 0}
+
+
+def _serialize_reel(reel: dict, user: dict = None) -> dict:
+    """Build the schemas.Reel payload from a reel document and its author"""
+    reel_data = {
+        "id": str(reel["_id"]),
+        "user_id": reel["user_id"],
+        "restaurant_id": reel.get("restaurant_id"),
+        "title": reel["title"],
+        "video_url": reel["video_url"],
+        "thumbnail_url": reel.get("thumbnail_url"),
+        "created_at": reel["created_at"],
+        "likes": reel.get("likes_count", 0),
+        "views": reel.get("views", 0),
+        "unique_viewers": reel.get("unique_viewers", 0)
+    }
+    
+    # Add user info if available
+    if user:
+        reel_data["user_name"] = user.get("name", "Unknown User")
+        reel_data["user_username"] = user.get("username", user.get("email", "").split("@")[0])
+        reel_data["user_picture"] = user.get("picture")
+    
+    return reel_data
+
 
 @router.get("/", response_model=List[schemas.Reel])
-async def get_reels(skip: int = 0, limit: int = 100):
-    """Get all reels with user information"""
+async def get_reels(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    Get all reels with user information
+    
+    Pass the X-Next-Cursor header of the previous page as `cursor` to keep
+    scrolling; `skip` is still honoured for clients that don't send one.
+    """
     db = get_database()
-    reels = await db.reels.find().sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
-    
-    result = []
-    for reel in reels:
-        # Count likes
-        likes_count = await db.users.count_documents({
-            "liked_reels": {"$in": [str(reel["_id"])]}
-        })
-        
-        # Get user info
-        user = await db.users.find_one({"_id": ObjectId(reel["user_id"])})
-        
-        reel_data = {
-            "id": str(reel["_id"]),
-            "user_id": reel["user_id"],
-            "restaurant_id": reel.get("restaurant_id"),
-            "title": reel["title"],
-            "video_url": reel["video_url"],
-            "thumbnail_url": reel.get("thumbnail_url"),
-            "created_at": reel["created_at"],
-            "likes": likes_count
-        }
-        
-        # Add user info if available
-        if user:
-            reel_data["user_name"] = user.get("name", "Unknown User")
-            reel_data["user_username"] = user.get("username", user.get("email", "").split("@")[0])
-            reel_data["user_picture"] = user.get("picture")
-        
-        result.append(reel_data)
+    query = keyset_filter(cursor) if cursor else {}
+    find = db.reels.find(query, REEL_PROJECTION).sort(keyset_sort())
+    if not cursor and skip:
+        find = find.skip(skip)
+    reels = await find.limit(limit).to_list(length=limit)
+    
+    page_cursor = next_cursor(reels, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    
+    # One batched author lookup for the whole page instead of one per reel
+    authors = await fetch_users(db, reels, AUTHOR_PROJECTION)
     
-    return result
+    return [_serialize_reel(reel, authors.get(reel["user_id"])) for reel in reels]
+
+
+@router.get("/feed", response_model=List[schemas.Reel])
+async def get_personalized_feed(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Get reels from the restaurants the current user follows or subscribes to"""
+    db = get_database()
+    entries = await read_timeline(db, current_user, skip, limit)
+    if not entries:
+        return []
+    
+    reel_ids = [e["reel_id"] for e in entries]
+    reels = await db.reels.find({"_id": {"$in": reel_ids}}, REEL_PROJECTION).to_list(length=len(reel_ids))
+    by_id = {r["_id"]: r for r in reels}
+    # Keep timeline order; reels deleted since fan-out simply drop out
+    ordered = [by_id[rid] for rid in reel_ids if rid in by_id]
+    
+    authors = await fetch_users(db, ordered, AUTHOR_PROJECTION)
+    
+    return [_serialize_reel(reel, authors.get(reel["user_id"])) for reel in ordered]
+
+
+@router.get("/liked", response_model=schemas.LikedReels)
+async def get_liked_reels(
+    ids: List[str] = Query(..., max_length=100),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Return which of the given reel ids the current user has liked"""
+    db = get_database()
+    likes = await db.reel_likes.find(
+        {"user_id": str(current_user["_id"]), "reel_id": {"$in": ids}},
+        {"reel_id": 1, "_id": 0}
+    ).to_list(length=len(ids))
+    
+    return {"liked": [like["reel_id"] for like in likes]}
+
+
+@router.get("/trending", response_model=List[schemas.Reel])
+async def get_trending_reels(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Get reels ranked by time-decayed likes and views"""
+    db = get_database()
+    reels = await db.reels.find({}, REEL_PROJECTION).sort(
+        [("trending_score", -1), ("_id", -1)]
+    ).skip(skip).limit(limit).to_list(length=limit)
+    
+    authors = await fetch_users(db, reels, AUTHOR_PROJECTION)
+    
+    return [_serialize_reel(reel, authors.get(reel["user_id"])) for reel in reels]
 
 
 @router.get("/{reel_id}", response_model=schemas.Reel)
 async def get_reel(reel_id: str):
     """Get a specific reel"""
     db = get_database()
-    reel = await db.reels.find_one({"_id": ObjectId(reel_id)})
+    reel = await db.reels.find_one({"_id": ObjectId(reel_id)}, REEL_PROJECTION)
     
     if not reel:
         raise HTTPException(status_code=404, detail="Reel not found")
     
-    # Count likes
-    likes_count = await db.users.count_documents({
-        "liked_reels": {"$in": [reel_id]}
-    })
+    return _serialize_reel(reel)
+
+
+@router.post("/{reel_id}/view", status_code=status.HTTP_202_ACCEPTED)
+async def record_reel_view(
+    reel_id: str,
+    request: Request,
+    user_id: Optional[str] = Depends(auth.get_optional_user_id)
+):
+    """
+    Record a view of a reel
+    
+    Views are buffered in memory and written in periodic batches, so counts
+    in the feed lag by up to VIEWS_FLUSH_INTERVAL_SECONDS.
+    """
+    if not ObjectId.is_valid(reel_id):
+        raise HTTPException(status_code=404, detail="Reel not found")
+    # Buffer under the canonical id that flush_views matches reels by
+    reel_id = str(ObjectId(reel_id))
     
+    # Anonymous viewers are distinguished by client address and user agent
+    viewer_key = user_id or f"{request.client.host if request.client else ''}|{request.headers.get('user-agent', '')}"
+    record_view(reel_id, viewer_key)
+    
+    return {"message": "View recorded"}
+
+
+def _serialize_job(job: dict) -> dict:
     return {
-        "id": str(reel["_id"]),
-        "user_id": reel["user_id"],
-        "restaurant_id": reel.get("restaurant_id"),
-        "title": reel["title"],
-        "video_url": reel["video_url"],
-        "thumbnail_url": reel.get("thumbnail_url"),
-        "created_at": reel["created_at"],
-        "likes": likes_count
+        "id": str(job["_id"]),
+        "status": job["status"],
+        "reel_id": job.get("reel_id"),
+        "error": job.get("error"),
+        "created_at": job["created_at"],
+        "updated_at": job.get("updated_at")
     }
 
 
-@router.post("/", response_model=schemas.Reel)
+@router.post("/", response_model=schemas.ReelJob, status_code=status.HTTP_202_ACCEPTED)
 async def create_reel(
     title: str = Form(...),
     video: UploadFile = File(...),
     restaurant_id: str = Form(None),
     current_user: dict = Depends(auth.get_current_user)
 ):
-    """Create a new reel with video upload to Cloudinary"""
-    db = get_database()
-    
-    # Create temporary file for upload
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(video.filename)[1]) as tmp_file:
-        # Copy uploaded file to temp file
-        shutil.copyfileobj(video.file, tmp_file)
-        tmp_file_path = tmp_file.name
+    """
+    Accept a reel upload for background processing
     
+    The video is spooled to disk and handed to the ingest workers, which
+    upload it, build the thumbnail and create the reel. Poll
+    GET /reels/jobs/{job_id} for the outcome.
+    """
+    file_path = spool_path(video.filename)
     try:
-        # Upload to Cloudinary
-        public_id = f"reel_{current_user['_id']}_{int(datetime.now().timestamp())}"
-        upload_result = upload_video(tmp_file_path, public_id=public_id)
-        
-        if not upload_result["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to upload video: {upload_result.get('error')}"
-            )
-        
-        # Generate thumbnail
-        thumbnail_url = generate_video_thumbnail(upload_result["public_id"])
-        
-        # Create reel in database
-        reel_data = ReelDB(
-            user_id=str(current_user["_id"]),
-            restaurant_id=restaurant_id,
-            title=title,
-            video_url=upload_result["url"],
-            thumbnail_url=thumbnail_url
-        )
+        with open(file_path, "wb") as spool_file:
+            await save_upload(video.file, spool_file)
         
-        result = await db.reels.insert_one(
-            reel_data.dict(by_alias=True, exclude={"id"})
-        )
-        
-        created_reel = await db.reels.find_one({"_id": result.inserted_id})
-        
-        return {
-            "id": str(created_reel["_id"]),
-            "user_id": created_reel["user_id"],
-            "restaurant_id": created_reel.get("restaurant_id"),
-            "title": created_reel["title"],
-            "video_url": created_reel["video_url"],
-            "thumbnail_url": created_reel.get("thumbnail_url"),
-            "created_at": created_reel["created_at"],
-            "likes": 0
-        }
-    
-    finally:
-        # Clean up temporary file
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
+        job = await submit_reel_job(str(current_user["_id"]), title, restaurant_id, str(file_path))
+    except Exception:
+        if file_path.exists():
+            file_path.unlink()
+        raise
+    
+    return _serialize_job(job)
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.ReelJob)
+async def get_reel_job(
+    job_id: str,
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Get the status of a reel upload job"""
+    db = get_database()
+    job = await db.reel_jobs.find_one({
+        "_id": ObjectId(job_id),
+        "user_id": str(current_user["_id"])
+    })
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return _serialize_job(job)
 
 
 @router.post("/{reel_id}/like")
@@ -150,21 +234,32 @@ async def like_reel(
     """Like a reel"""
     db = get_database()
     
-    reel = await db.reels.find_one({"_id": ObjectId(reel_id)})
+    reel = await db.reels.find_one({"_id": ObjectId(reel_id)}, {"likes_count": 1, "created_at": 1})
     if not reel:
         raise HTTPException(status_code=404, detail="Reel not found")
     
-    await db.users.update_one(
-        {"_id": ObjectId(current_user["_id"])},
-        {"$addToSet": {"liked_reels": reel_id}}
-    )
-    
-    # Count total likes
-    likes_count = await db.users.count_documents({
-        "liked_reels": {"$in": [reel_id]}
-    })
+    # The unique (user_id, reel_id) index makes repeated likes a no-op
+    like = ReelLikeDB(user_id=str(current_user["_id"]), reel_id=reel_id)
+    try:
+        await db.reel_likes.insert_one(like.dict(by_alias=True, exclude={"id"}))
+    except DuplicateKeyError:
+        pass
+    else:
+        reel = await db.reels.find_one_and_update(
+            {"_id": ObjectId(reel_id)},
+            {"$inc": {
+                "likes_count": 1,
+                "trending_score": engagement_score(reel["created_at"], likes=1)
+            }},
+            projection={"likes_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not reel:
+            # Deleted since the check above; don't leave the like behind
+            await db.reel_likes.delete_one({"user_id": like.user_id, "reel_id": reel_id})
+            raise HTTPException(status_code=404, detail="Reel not found")
     
-    return {"message": "Reel liked successfully", "likes": likes_count}
+    return {"message": "Reel liked successfully", "likes": reel.get("likes_count", 0)}
 
 
 @router.delete("/{reel_id}/like")
@@ -175,21 +270,43 @@ async def unlike_reel(
     """Unlike a reel"""
     db = get_database()
     
-    reel = await db.reels.find_one({"_id": ObjectId(reel_id)})
+    reel = await db.reels.find_one({"_id": ObjectId(reel_id)}, {"likes_count": 1, "created_at": 1})
     if not reel:
         raise HTTPException(status_code=404, detail="Reel not found")
     
-    await db.users.update_one(
-        {"_id": ObjectId(current_user["_id"])},
-        {"$pull": {"liked_reels": reel_id}}
-    )
-    
-    # Count total likes
-    likes_count = await db.users.count_documents({
-        "liked_reels": {"$in": [reel_id]}
+    # Only decrement when a like was actually removed
+    result = await db.reel_likes.delete_one({
+        "user_id": str(current_user["_id"]),
+        "reel_id": reel_id
     })
+    if result.deleted_count:
+        reel = await db.reels.find_one_and_update(
+            {"_id": ObjectId(reel_id)},
+            {"$inc": {
+                "likes_count": -1,
+                "trending_score": engagement_score(reel["created_at"], likes=-1)
+            }},
+            projection={"likes_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not reel:
+            raise HTTPException(status_code=404, detail="Reel not found")
     
-    return {"message": "Reel unliked successfully", "likes": likes_count}
+    return {"message": "Reel unliked successfully", "likes": max(reel.get("likes_count", 0), 0)}
+
+
+def _public_id_from_url(video_url: str) -> Optional[str]:
+    """Recover the Cloudinary public_id of reels created before it was stored"""
+    if "cloudinary.com" not in video_url:
+        return None
+    # URL format: https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{transformations}/v{version}/{public_id}.{format}
+    parts = video_url.split("/")
+    if "upload" not in parts:
+        return None
+    path = parts[parts.index("upload")+1:]
+    if path and path[0].startswith("v") and path[0][1:].isdigit():
+        path = path[1:]
+    return "/".join(path).rsplit(".", 1)[0] or None
 
 
 @router.delete("/{reel_id}")
@@ -207,19 +324,12 @@ async def delete_reel(
     if reel["user_id"] != str(current_user["_id"]):
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Extract Cloudinary public_id from URL and delete from Cloudinary
-    video_url = reel.get("video_url", "")
-    if "cloudinary.com" in video_url:
-        # Extract public_id from Cloudinary URL
-        try:
-            # URL format: https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{transformations}/{public_id}.{format}
-            parts = video_url.split("/")
-            public_id_with_ext = "/".join(parts[parts.index("upload")+1:])
-            public_id = public_id_with_ext.rsplit(".", 1)[0]
-            delete_video(public_id)
-        except Exception as e:
-            print(f"Failed to delete video from Cloudinary: {e}")
+    # Storage cleanup happens in the background via the deletion outbox
+    public_id = reel.get("public_id") or _public_id_from_url(reel.get("video_url", ""))
+    if public_id:
+        await enqueue_deletion(db, public_id)
     
     await db.reels.delete_one({"_id": ObjectId(reel_id)})
+    await db.reel_likes.delete_many({"reel_id": reel_id})
     
     return {"message": "Reel deleted successfully"}
@@ -1,45 +1,254 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
 from datetime import datetime
 from bson import ObjectId
+from pydantic import TypeAdapter
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import uuid
 
 from .. import schemas, auth
+from ..bulk_import import detect_format, import_catalog
 from ..database import get_database
-from ..models import RestaurantDB, MenuItemDB
+from ..cache import invalidate_restaurant, restaurant_cache
+from ..config import settings
+from ..menus import fetch_menus, refresh_search_fields, serialize_menu_item
+from ..models import RestaurantDB, MenuItemDB, RestaurantFollowerDB
+from ..feed import invalidate_timeline
+from ..search import matched_menu_items, restaurant_ngrams, search_restaurants, trigrams
+from ..ratings import STARS
+from ..pagination import NEXT_CURSOR_HEADER, keyset_filter, keyset_sort, next_cursor
+from ..users import fetch_users
 
 router = APIRouter(prefix="/restaurants", tags=["restaurants"])
 
+MENU_ADAPTER = TypeAdapter(List[schemas.MenuItem])
 
-@router.get("/", response_model=List[schemas.Restaurant])
-async def get_restaurants(skip: int = 0, limit: int = 100):
-    """Get all restaurants"""
+
+# Fields a restaurant listing can be narrowed to with `fields=`
+# (`location` selects latitude and longitude)
+LISTING_FIELDS = {
+    "name", "cuisine", "rating", "rating_count", "delivery_fee", "eta_mins",
+    "image", "description", "location", "followers_count", "subscribers_count",
+    "created_at", "menu_items"
+}
+
+# Edge kind -> (user array the feed reads, restaurant counter)
+FOLLOW_KINDS = {
+    "follow": ("followed_restaurants", "followers_count"),
+    "subscribe": ("subscribed_restaurants", "subscribers_count"),
+}
+
+FOLLOWER_PROJECTION = {"name": 1, "username": 1, "picture": 1}
+
+
+# Bucket boundaries and labels for the rating and delivery fee facets
+RATING_BUCKETS = [0, 1, 2, 3, 4, 4.5, 5.01]
+RATING_LABELS = ["0-1", "1-2", "2-3", "3-4", "4-4.5", "4.5-5"]
+DELIVERY_FEE_BUCKETS = [0, 1, 2, 5, 10, float("inf")]
+DELIVERY_FEE_LABELS = ["0-1", "1-2", "2-5", "5-10", "10+"]
+
+
+def restaurant_filters(
+    cuisine: Optional[List[str]] = Query(None),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    max_delivery_fee: Optional[float] = Query(None, ge=0),
+    max_eta_mins: Optional[int] = Query(None, ge=0)
+) -> dict:
+    """MongoDB filter for the restaurant listing and facet query parameters"""
+    query = {}
+    if cuisine:
+        query["cuisine"] = {"$in": cuisine}
+    if min_rating is not None:
+        query["rating"] = {"$gte": min_rating}
+    if max_delivery_fee is not None:
+        query["delivery_fee"] = {"$lte": max_delivery_fee}
+    if max_eta_mins is not None:
+        query["eta_mins"] = {"$lte": max_eta_mins}
+    return query
+
+
+def _coordinates(r: dict) -> dict:
+    """latitude/longitude from a restaurant's GeoJSON location"""
+    location = r.get("location")
+    if not location:
+        return {"latitude": None, "longitude": None}
+    lng, lat = location["coordinates"]
+    return {"latitude": lat, "longitude": lng}
+
+
+def _serialize_restaurant(r: dict, fields: Optional[set] = None, menu: Optional[List[dict]] = None) -> dict:
+    """Build the restaurant payload, limited to `fields` when given (menu_items only if `menu` is passed)"""
+    data = {
+        "id": str(r["_id"]),
+        "name": r.get("name"),
+        "cuisine": r.get("cuisine"),
+        "rating": r.get("rating"),
+        "rating_count": r.get("rating_count", 0),
+        "delivery_fee": r.get("delivery_fee"),
+        "eta_mins": r.get("eta_mins"),
+        "image": r.get("image"),
+        "description": r.get("description"),
+        **_coordinates(r),
+        "followers_count": r.get("followers_count", 0),
+        "subscribers_count": r.get("subscribers_count", 0),
+        "created_at": r.get("created_at"),
+    }
+    if menu is not None:
+        data["menu_items"] = [serialize_menu_item(item) for item in menu]
+    if fields is not None:
+        if "location" in fields:
+            fields = fields | {"latitude", "longitude"}
+        data = {k: v for k, v in data.items() if k == "id" or k in fields}
+    return data
+
+
+@router.get(
+    "/",
+    response_model=List[schemas.RestaurantListItem],
+    response_model_exclude_unset=True
+)
+async def get_restaurants(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    fields: Optional[str] = None,
+    filters: dict = Depends(restaurant_filters)
+):
+    """
+    Get all restaurants (oldest first)
+    
+    Filter with `cuisine` (repeatable), `min_rating`, `max_delivery_fee` and
+    `max_eta_mins`; /restaurants/facets returns the matching counts.
+    `summary=true` leaves out menus (fetch them from /restaurants/{id}/menu);
+    `fields=name,rating,...` returns only the listed fields plus `id`.
+    Pass the X-Next-Cursor header of the previous page as `cursor` to page
+    forward; `skip` is still honoured for clients that don't send one.
+    """
+    db = get_database()
+    
+    selected = None
+    if fields:
+        selected = {f.strip() for f in fields.split(",")} & LISTING_FIELDS
+        # created_at is always read because the page cursor is built from it
+        projection = {f: 1 for f in (selected - {"menu_items"}) | {"created_at"}}
+    else:
+        projection = {"search_ngrams": 0, "menu_item_names": 0}
+    
+    query = dict(filters)
+    if cursor:
+        query.update(keyset_filter(cursor, descending=False))
+    find = db.restaurants.find(query, projection).sort(keyset_sort(descending=False))
+    if not cursor and skip:
+        find = find.skip(skip)
+    restaurants = await find.limit(limit).to_list(length=limit)
+    
+    page_cursor = next_cursor(restaurants, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    
+    with_menu = "menu_items" in selected if selected is not None else not summary
+    if not with_menu:
+        return [_serialize_restaurant(r, selected) for r in restaurants]
+    
+    # All menus on the page in one query
+    menus = await fetch_menus(db, [str(r["_id"]) for r in restaurants])
+    return [_serialize_restaurant(r, selected, menus.get(str(r["_id"]), [])) for r in restaurants]
+
+
+def _bucket_counts(rows: List[dict], boundaries: list, labels: List[str]) -> List[dict]:
+    counts = {row["_id"]: row["count"] for row in rows}
+    return [
+        {"value": label, "count": counts.get(lower, 0)}
+        for lower, label in zip(boundaries, labels)
+    ]
+
+
+@router.get("/facets", response_model=schemas.RestaurantFacets)
+async def get_restaurant_facets(filters: dict = Depends(restaurant_filters)):
+    """Counts per cuisine, rating bucket and delivery fee bucket for the given filters"""
+    db = get_database()
+    pipeline = [
+        {"$match": filters},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "cuisine": [{"$sortByCount": "$cuisine"}],
+            "rating": [{"$bucket": {
+                "groupBy": "$rating",
+                "boundaries": RATING_BUCKETS,
+                "default": "other"
+            }}],
+            "delivery_fee": [{"$bucket": {
+                "groupBy": "$delivery_fee",
+                "boundaries": DELIVERY_FEE_BUCKETS,
+                "default": "other"
+            }}]
+        }}
+    ]
+    result = (await db.restaurants.aggregate(pipeline).to_list(length=1))[0]
+    
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "cuisine": [{"value": row["_id"], "count": row["count"]} for row in result["cuisine"]],
+        "rating": _bucket_counts(result["rating"], RATING_BUCKETS, RATING_LABELS),
+        "delivery_fee": _bucket_counts(result["delivery_fee"], DELIVERY_FEE_BUCKETS, DELIVERY_FEE_LABELS)
+    }
+
+
+@router.get("/search", response_model=List[schemas.RestaurantSearchResult])
+async def search(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(20, ge=1, le=50)):
+    """Search restaurants and menu items by name, cuisine or description (typo tolerant)"""
     db = get_database()
-    restaurants = await db.restaurants.find().skip(skip).limit(limit).to_list(length=limit)
+    restaurants = await search_restaurants(db, q, limit)
+    menus = await fetch_menus(db, [str(r["_id"]) for r in restaurants])
     
     return [
         {
-            "id": str(r["_id"]),
-            "name": r["name"],
-            "cuisine": r["cuisine"],
-            "rating": r["rating"],
-            "delivery_fee": r["delivery_fee"],
-            "eta_mins": r["eta_mins"],
-            "image": r["image"],
-            "description": r.get("description"),
-            "created_at": r["created_at"],
-            "menu_items": [
-                {
-                    "id": item["id"],
-                    "name": item["name"],
-                    "price": item["price"],
-                    "description": item.get("description"),
-                    "image": item.get("image"),
-                    "available": item.get("available", True),
-                    "restaurant_id": str(r["_id"])
-                }
-                for item in r.get("menu_items", [])
-            ]
+            **_serialize_restaurant(r),
+            "score": r["score"],
+            "matched_menu_items": matched_menu_items(menus.get(str(r["_id"]), []), q)
+        }
+        for r in restaurants
+    ]
+
+
+@router.get("/nearby", response_model=List[schemas.NearbyRestaurant])
+async def get_nearby_restaurants(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(5000, gt=0, le=50000),
+    limit: int = Query(50, ge=1, le=100)
+):
+    """
+    Get restaurants within `radius` meters of a point, nearest first
+    
+    Each result carries its distance and an ETA adjusted for travel
+    (DELIVERY_MINUTES_PER_KM), computed in the same $geoNear pass.
+    """
+    db = get_database()
+    pipeline = [
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lng, lat]},
+            "distanceField": "distance_m",
+            "maxDistance": radius,
+            "spherical": True
+        }},
+        {"$limit": limit},
+        {"$project": {"menu_item_names": 0, "search_ngrams": 0}},
+        {"$addFields": {"adjusted_eta_mins": {"$ceil": {"$add": [
+            "$eta_mins",
+            {"$multiply": [{"$divide": ["$distance_m", 1000]}, settings.DELIVERY_MINUTES_PER_KM]}
+        ]}}}}
+    ]
+    restaurants = await db.restaurants.aggregate(pipeline).to_list(length=limit)
+    
+    return [
+        {
+            **_serialize_restaurant(r),
+            "distance_m": round(r["distance_m"], 1),
+            "adjusted_eta_mins": int(r["adjusted_eta_mins"])
         }
         for r in restaurants
     ]
@@ -47,38 +256,110 @@ async def get_restaurants(skip: int = 0, limit: int = 100):
 
 @router.get("/{restaurant_id}", response_model=schemas.Restaurant)
 async def get_restaurant(restaurant_id: str):
-    """Get a specific restaurant by ID"""
+    """Get a specific restaurant by ID (served from the per-worker cache when warm)"""
     db = get_database()
-    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
+    if not ObjectId.is_valid(restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    # Key the cache by the canonical id, the one invalidation publishes
+    restaurant_id = str(ObjectId(restaurant_id))
+    cache_key = f"detail:{restaurant_id}"
+    body = restaurant_cache.get(cache_key)
+    if body is None:
+        restaurant = await db.restaurants.find_one(
+            {"_id": ObjectId(restaurant_id)},
+            {"search_ngrams": 0, "menu_item_names": 0}
+        )
+        
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        
+        menus = await fetch_menus(db, [restaurant_id])
+        body = schemas.Restaurant(**_serialize_restaurant(restaurant, menu=menus[restaurant_id])).model_dump_json()
+        restaurant_cache.set(cache_key, body)
     
-    if not restaurant:
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/{restaurant_id}/rating-stats", response_model=schemas.RatingStats)
+async def get_rating_stats(restaurant_id: str):
+    """Star distribution and recent-window rating stats, from the precomputed counters"""
+    db = get_database()
+    
+    if not ObjectId.is_valid(restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    r = await db.restaurants.find_one(
+        {"_id": ObjectId(restaurant_id)},
+        {"rating": 1, "rating_count": 1, "rating_histogram": 1, "recent_ratings": 1}
+    )
+    if not r:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
+    histogram = r.get("rating_histogram") or {}
+    recent = r.get("recent_ratings") or {}
+    recent_histogram = recent.get("histogram") or {}
+    rating = r.get("rating", 0.0)
     return {
-        "id": str(restaurant["_id"]),
-        "name": restaurant["name"],
-        "cuisine": restaurant["cuisine"],
-        "rating": restaurant["rating"],
-        "delivery_fee": restaurant["delivery_fee"],
-        "eta_mins": restaurant["eta_mins"],
-        "image": restaurant["image"],
-        "description": restaurant.get("description"),
-        "created_at": restaurant["created_at"],
-        "menu_items": [
-            {
-                "id": item["id"],
-                "name": item["name"],
-                "price": item["price"],
-                "description": item.get("description"),
-                "image": item.get("image"),
-                "available": item.get("available", True),
-                "restaurant_id": str(restaurant["_id"])
-            }
-            for item in restaurant.get("menu_items", [])
-        ]
+        "restaurant_id": restaurant_id,
+        "rating": rating,
+        "rating_count": r.get("rating_count", 0),
+        "histogram": {star: histogram.get(star, 0) for star in STARS},
+        "recent": {
+            "window_days": settings.RATING_STATS_WINDOW_DAYS,
+            "count": recent.get("count", 0),
+            "average": recent.get("average", 0.0),
+            "histogram": {star: recent_histogram.get(star, 0) for star in STARS},
+            "trend": round(recent["average"] - rating, 1) if recent.get("count") else 0.0,
+            "updated_at": recent.get("updated_at")
+        }
     }
 
 
+@router.get("/{restaurant_id}/menu", response_model=List[schemas.MenuItem])
+async def get_menu(
+    restaurant_id: str,
+    response: Response,
+    limit: int = Query(100, gt=0, le=500),
+    cursor: Optional[str] = None,
+    available: Optional[bool] = None
+):
+    """
+    Get a restaurant's menu, one page at a time
+    
+    Pass the X-Next-Cursor header of the previous page as `cursor` to read
+    on; `available=true` hides disabled items. First pages are served from
+    the per-worker cache when warm.
+    """
+    db = get_database()
+    if not ObjectId.is_valid(restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    # Key the cache by the canonical id, the one invalidation publishes
+    restaurant_id = str(ObjectId(restaurant_id))
+    cache_key = f"menu:{restaurant_id}:{limit}:{available}"
+    cached = None if cursor else restaurant_cache.get(cache_key)
+    if cached is None:
+        restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)}, {"_id": 1})
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        
+        query = {"restaurant_id": restaurant_id}
+        if available is not None:
+            query["available"] = available
+        if cursor:
+            query.update(keyset_filter(cursor, descending=False))
+        items = await db.menu_items.find(query).sort(
+            keyset_sort(descending=False)
+        ).limit(limit).to_list(length=limit)
+        
+        menu = [serialize_menu_item(item) for item in items]
+        cached = (MENU_ADAPTER.dump_json(MENU_ADAPTER.validate_python(menu)), next_cursor(items, limit))
+        if not cursor:
+            restaurant_cache.set(cache_key, cached)
+    
+    body, page_cursor = cached
+    headers = {NEXT_CURSOR_HEADER: page_cursor} if page_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.post("/", response_model=schemas.Restaurant, status_code=status.HTTP_201_CREATED)
 async def create_restaurant(
     restaurant: schemas.RestaurantCreate,
@@ -87,25 +368,36 @@ async def create_restaurant(
     """Create a new restaurant"""
     db = get_database()
     
-    restaurant_data = RestaurantDB(**restaurant.dict())
+    location = None
+    if restaurant.latitude is not None and restaurant.longitude is not None:
+        location = {"type": "Point", "coordinates": [restaurant.longitude, restaurant.latitude]}
+    
+    restaurant_data = RestaurantDB(
+        **restaurant.dict(exclude={"latitude", "longitude"}),
+        location=location,
+        search_ngrams=restaurant_ngrams(restaurant.name, restaurant.cuisine)
+    )
     result = await db.restaurants.insert_one(
         restaurant_data.dict(by_alias=True, exclude={"id"})
     )
     
     created_restaurant = await db.restaurants.find_one({"_id": result.inserted_id})
     
-    return {
-        "id": str(created_restaurant["_id"]),
-        "name": created_restaurant["name"],
-        "cuisine": created_restaurant["cuisine"],
-        "rating": created_restaurant["rating"],
-        "delivery_fee": created_restaurant["delivery_fee"],
-        "eta_mins": created_restaurant["eta_mins"],
-        "image": created_restaurant["image"],
-        "description": created_restaurant.get("description"),
-        "created_at": created_restaurant["created_at"],
-        "menu_items": []
-    }
+    return _serialize_restaurant(created_restaurant, menu=[])
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_restaurants(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """
+    Bulk import restaurants and menu items from an NDJSON or CSV upload.
+    The format is taken from `format`, else the file name / content type.
+    """
+    db = get_database()
+    return await import_catalog(db, file, detect_format(file, format))
 
 
 @router.post("/{restaurant_id}/menu", response_model=schemas.MenuItem)
@@ -117,45 +409,186 @@ async def add_menu_item(
     """Add menu item to restaurant"""
     db = get_database()
     
-    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
+    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)}, {"_id": 1})
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
     menu_item_data = MenuItemDB(
         id=str(uuid.uuid4()),
+        restaurant_id=restaurant_id,
         **menu_item.dict()
     )
+    item = menu_item_data.dict(by_alias=True)
+    await db.menu_items.insert_one(item)
     
+    # Keep the restaurant's search fields in step with its menu
     await db.restaurants.update_one(
         {"_id": ObjectId(restaurant_id)},
-        {"$push": {"menu_items": menu_item_data.dict()}}
+        {"$addToSet": {
+            "menu_item_names": menu_item.name,
+            "search_ngrams": {"$each": sorted(trigrams(menu_item.name))}
+        }}
     )
+    await invalidate_restaurant(restaurant_id)
     
-    return {
-        "id": menu_item_data.id,
-        "restaurant_id": restaurant_id,
-        **menu_item.dict()
-    }
+    return serialize_menu_item(item)
 
 
-@router.post("/{restaurant_id}/follow")
-async def follow_restaurant(
+async def _update_menu_item(db, restaurant_id: str, item_id: str, changes: dict) -> dict:
+    """Apply changes to one menu item and keep search fields and caches in step"""
+    item = await db.menu_items.find_one_and_update(
+        {"_id": item_id, "restaurant_id": restaurant_id},
+        {"$set": {**changes, "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not item:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    
+    if "name" in changes:
+        restaurant = await db.restaurants.find_one(
+            {"_id": ObjectId(restaurant_id)},
+            {"name": 1, "cuisine": 1}
+        )
+        if restaurant:
+            await refresh_search_fields(db, restaurant)
+    await invalidate_restaurant(restaurant_id)
+    
+    return serialize_menu_item(item)
+
+
+@router.patch("/{restaurant_id}/menu/{item_id}", response_model=schemas.MenuItem)
+async def update_menu_item(
     restaurant_id: str,
+    item_id: str,
+    menu_item: schemas.MenuItemUpdate,
     current_user: dict = Depends(auth.get_current_user)
 ):
-    """Follow a restaurant"""
+    """Update fields of a single menu item"""
     db = get_database()
     
-    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
+    changes = menu_item.dict(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No changes provided")
+    
+    return await _update_menu_item(db, restaurant_id, item_id, changes)
+
+
+@router.patch("/{restaurant_id}/menu/{item_id}/availability", response_model=schemas.MenuItem)
+async def set_menu_item_availability(
+    restaurant_id: str,
+    item_id: str,
+    availability: schemas.MenuItemAvailability,
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Enable or disable a menu item"""
+    db = get_database()
+    return await _update_menu_item(db, restaurant_id, item_id, {"available": availability.available})
+
+
+async def _add_follower(db, restaurant_id: str, user_id: str, kind: str) -> int:
+    """Record a follow/subscribe edge; returns the restaurant's counter for `kind`"""
+    array_field, counter = FOLLOW_KINDS[kind]
+    if not ObjectId.is_valid(restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)}, {counter: 1})
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
-    await db.users.update_one(
-        {"_id": ObjectId(current_user["_id"])},
-        {"$addToSet": {"followed_restaurants": restaurant_id}}
+    # The unique (user_id, restaurant_id, kind) index makes repeated follows a no-op
+    edge = RestaurantFollowerDB(user_id=user_id, restaurant_id=restaurant_id, kind=kind)
+    try:
+        await db.restaurant_followers.insert_one(edge.dict(by_alias=True, exclude={"id"}))
+    except DuplicateKeyError:
+        return restaurant.get(counter, 0)
+    
+    restaurant = await db.restaurants.find_one_and_update(
+        {"_id": ObjectId(restaurant_id)},
+        {"$inc": {counter: 1}},
+        projection={counter: 1},
+        return_document=ReturnDocument.AFTER
+    )
+    await db.users.update_one({"_id": ObjectId(user_id)}, {"$addToSet": {array_field: restaurant_id}})
+    await invalidate_timeline(db, user_id)
+    await invalidate_restaurant(restaurant_id)
+    return restaurant.get(counter, 0)
+
+
+async def _remove_follower(db, restaurant_id: str, user_id: str, kind: str) -> int:
+    """Delete a follow/subscribe edge; returns the restaurant's counter for `kind`"""
+    array_field, counter = FOLLOW_KINDS[kind]
+    if not ObjectId.is_valid(restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    
+    # Only decrement when an edge was actually removed
+    result = await db.restaurant_followers.delete_one(
+        {"user_id": user_id, "restaurant_id": restaurant_id, "kind": kind}
     )
+    if not result.deleted_count:
+        restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)}, {counter: 1})
+        return restaurant.get(counter, 0) if restaurant else 0
+    
+    restaurant = await db.restaurants.find_one_and_update(
+        {"_id": ObjectId(restaurant_id)},
+        {"$inc": {counter: -1}},
+        projection={counter: 1},
+        return_document=ReturnDocument.AFTER
+    )
+    await db.users.update_one({"_id": ObjectId(user_id)}, {"$pull": {array_field: restaurant_id}})
+    await invalidate_timeline(db, user_id)
+    await invalidate_restaurant(restaurant_id)
+    return max(restaurant.get(counter, 0), 0) if restaurant else 0
+
+
+@router.get("/{restaurant_id}/followers", response_model=List[schemas.RestaurantFollower])
+async def get_restaurant_followers(
+    restaurant_id: str,
+    response: Response,
+    kind: str = Query("follow", pattern="^(follow|subscribe)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """
+    Followers (or subscribers, with `kind=subscribe`) of a restaurant, newest first
+    
+    Pass the X-Next-Cursor header of the previous page as `cursor` to page forward.
+    """
+    db = get_database()
+    
+    query = {"restaurant_id": restaurant_id, "kind": kind}
+    if cursor:
+        query.update(keyset_filter(cursor))
+    edges = await db.restaurant_followers.find(query).sort(keyset_sort()).limit(limit).to_list(length=limit)
+    
+    page_cursor = next_cursor(edges, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    
+    # All users on the page in one query
+    users = await fetch_users(db, edges, FOLLOWER_PROJECTION)
+    
+    return [
+        {
+            "user_id": e["user_id"],
+            "name": users.get(e["user_id"], {}).get("name"),
+            "username": users.get(e["user_id"], {}).get("username"),
+            "picture": users.get(e["user_id"], {}).get("picture"),
+            "followed_at": e["created_at"]
+        }
+        for e in edges
+    ]
+
+
+@router.post("/{restaurant_id}/follow")
+async def follow_restaurant(
+    restaurant_id: str,
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Follow a restaurant"""
+    db = get_database()
+    
+    count = await _add_follower(db, restaurant_id, str(current_user["_id"]), "follow")
     
-    return {"message": "Restaurant followed successfully"}
+    return {"message": "Restaurant followed successfully", "followers": count}
 
 
 @router.delete("/{restaurant_id}/follow")
@@ -166,12 +599,9 @@ async def unfollow_restaurant(
     """Unfollow a restaurant"""
     db = get_database()
     
-    await db.users.update_one(
-        {"_id": ObjectId(current_user["_id"])},
-        {"$pull": {"followed_restaurants": restaurant_id}}
-    )
+    count = await _remove_follower(db, restaurant_id, str(current_user["_id"]), "follow")
     
-    return {"message": "Restaurant unfollowed successfully"}
+    return {"message": "Restaurant unfollowed successfully", "followers": count}
 
 
 @router.post("/{restaurant_id}/subscribe")
@@ -182,16 +612,9 @@ async def subscribe_restaurant(
     """Subscribe to a restaurant"""
     db = get_database()
     
-    restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
-    if not restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-    
-    await db.users.update_one(
-        {"_id": ObjectId(current_user["_id"])},
-        {"$addToSet": {"subscribed_restaurants": restaurant_id}}
-    )
+    count = await _add_follower(db, restaurant_id, str(current_user["_id"]), "subscribe")
     
-    return {"message": "Subscribed successfully"}
+    return {"message": "Subscribed successfully", "subscribers": count}
 
 
 @router.delete("/{restaurant_id}/subscribe")
@@ -202,9 +625,6 @@ async def unsubscribe_restaurant(
     """Unsubscribe from a restaurant"""
     db = get_database()
     
-    await db.users.update_one(
-        {"_id": ObjectId(current_user["_id"])},
-        {"$pull": {"subscribed_restaurants": restaurant_id}}
-    )
+    count = await _remove_follower(db, restaurant_id, str(current_user["_id"]), "subscribe")
     
-    return {"message": "Unsubscribed successfully"}
+    return {"message": "Unsubscribed successfully", "subscribers": count}
@@ -1,36 +1,72 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 from .. import schemas, auth
 from ..database import get_database
 from ..models import ReviewDB
+from ..pagination import NEXT_CURSOR_HEADER, keyset_filter, keyset_sort, next_cursor
+from ..ratings import apply_review
+from ..users import fetch_users
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+# sort option -> (keyset field, descending)
+REVIEW_SORTS = {
+    "newest": ("created_at", True),
+    "highest": ("rating", True),
+    "lowest": ("rating", False),
+}
+
+AUTHOR_PROJECTION = {"name": 1, "picture": 1}
+
+
+def _serialize_review(review: dict, user: Optional[dict] = None) -> dict:
+    """Build the schemas.Review payload from a review document and its author"""
+    return {
+        "id": str(review["_id"]),
+        "user_id": review["user_id"],
+        "restaurant_id": review["restaurant_id"],
+        "rating": review["rating"],
+        "text": review["text"],
+        "created_at": review["created_at"],
+        "user_name": user["name"] if user else "Unknown",
+        "user_avatar": user.get("picture") if user else None
+    }
+
 
 @router.get("/restaurant/{restaurant_id}", response_model=List[schemas.Review])
-async def get_restaurant_reviews(restaurant_id: str):
-    """Get all reviews for a restaurant"""
+async def get_restaurant_reviews(
+    restaurant_id: str,
+    response: Response,
+    sort: str = Query("newest", pattern="^(newest|highest|lowest)$"),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """
+    Get reviews for a restaurant, sorted `newest`, `highest` or `lowest` rated
+    
+    Pass the X-Next-Cursor header of the previous page as `cursor` to page
+    forward (with the same `sort`).
+    """
     db = get_database()
-    reviews = await db.reviews.find({"restaurant_id": restaurant_id}).to_list(length=100)
+    field, descending = REVIEW_SORTS[sort]
     
-    result = []
-    for review in reviews:
-        user = await db.users.find_one({"_id": ObjectId(review["user_id"])})
-        result.append({
-            "id": str(review["_id"]),
-            "user_id": review["user_id"],
-            "restaurant_id": review["restaurant_id"],
-            "rating": review["rating"],
-            "text": review["text"],
-            "created_at": review["created_at"],
-            "user_name": user["name"] if user else "Unknown",
-            "user_avatar": user.get("picture") if user else None
-        })
+    query = {"restaurant_id": restaurant_id}
+    if cursor:
+        query.update(keyset_filter(cursor, field, descending))
+    reviews = await db.reviews.find(query).sort(
+        keyset_sort(field, descending)
+    ).limit(limit).to_list(length=limit)
     
-    return result
+    page_cursor = next_cursor(reviews, limit, field)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    
+    authors = await fetch_users(db, reviews, AUTHOR_PROJECTION)
+    return [_serialize_review(review, authors.get(review["user_id"])) for review in reviews]
 
 
 @router.get("/user/me", response_model=List[schemas.Review])
@@ -41,20 +77,7 @@ async def get_my_reviews(current_user: dict = Depends(auth.get_current_user)):
         {"user_id": str(current_user["_id"])}
     ).to_list(length=100)
     
-    result = []
-    for review in reviews:
-        result.append({
-            "id": str(review["_id"]),
-            "user_id": review["user_id"],
-            "restaurant_id": review["restaurant_id"],
-            "rating": review["rating"],
-            "text": review["text"],
-            "created_at": review["created_at"],
-            "user_name": current_user["name"],
-            "user_avatar": current_user.get("picture")
-        })
-    
-    return result
+    return [_serialize_review(review, current_user) for review in reviews]
 
 
 @router.post("/", response_model=schemas.Review)
@@ -66,53 +89,29 @@ async def create_review(
     db = get_database()
     
     # Check if restaurant exists
-    restaurant = await db.restaurants.find_one({"_id": ObjectId(review.restaurant_id)})
+    restaurant = await db.restaurants.find_one({"_id": ObjectId(review.restaurant_id)}, {"_id": 1})
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
-    # Check if user already reviewed this restaurant
-    existing_review = await db.reviews.find_one({
-        "user_id": str(current_user["_id"]),
-        "restaurant_id": review.restaurant_id
-    })
-    
-    if existing_review:
-        raise HTTPException(
-            status_code=400,
-            detail="You have already reviewed this restaurant"
-        )
-    
-    # Create review
+    # The unique (user_id, restaurant_id) index rejects a second review,
+    # including concurrent double-submits
     review_data = ReviewDB(
         user_id=str(current_user["_id"]),
         **review.dict()
     )
+    doc = review_data.dict(by_alias=True, exclude={"id"})
+    try:
+        result = await db.reviews.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="You have already reviewed this restaurant"
+        )
     
-    result = await db.reviews.insert_one(
-        review_data.dict(by_alias=True, exclude={"id"})
-    )
-    
-    # Update restaurant rating
-    reviews = await db.reviews.find({"restaurant_id": review.restaurant_id}).to_list(length=1000)
-    avg_rating = sum(r["rating"] for r in reviews) / len(reviews) if reviews else 0
-    
-    await db.restaurants.update_one(
-        {"_id": ObjectId(review.restaurant_id)},
-        {"$set": {"rating": round(avg_rating, 1)}}
-    )
-    
-    created_review = await db.reviews.find_one({"_id": result.inserted_id})
+    await apply_review(db, review.restaurant_id, review.rating)
     
-    return {
-        "id": str(created_review["_id"]),
-        "user_id": created_review["user_id"],
-        "restaurant_id": created_review["restaurant_id"],
-        "rating": created_review["rating"],
-        "text": created_review["text"],
-        "created_at": created_review["created_at"],
-        "user_name": current_user["name"],
-        "user_avatar": current_user.get("picture")
-    }
+    doc["_id"] = result.inserted_id
+    return _serialize_review(doc, current_user)
 
 
 @router.delete("/{review_id}")
@@ -131,15 +130,9 @@ async def delete_review(
         raise HTTPException(status_code=403, detail="Not authorized to delete this review")
     
     restaurant_id = review["restaurant_id"]
-    await db.reviews.delete_one({"_id": ObjectId(review_id)})
-    
-    # Update restaurant rating
-    reviews = await db.reviews.find({"restaurant_id": restaurant_id}).to_list(length=1000)
-    avg_rating = sum(r["rating"] for r in reviews) / len(reviews) if reviews else 0.0
-    
-    await db.restaurants.update_one(
-        {"_id": ObjectId(restaurant_id)},
-        {"$set": {"rating": round(avg_rating, 1)}}
-    )
+    result = await db.reviews.delete_one({"_id": ObjectId(review_id)})
+    # Only the request that actually removed the review adjusts the counters
+    if result.deleted_count:
+        await apply_review(db, restaurant_id, review["rating"], delta=-1)
     
     return {"message": "Review deleted successfully"}
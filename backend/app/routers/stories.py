@@ -3,13 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from datetime import datetime, timedelta
 from bson import ObjectId
 import os
-import shutil
 import tempfile
 
 from .. import schemas, auth
 from ..database import get_database
 from ..models import StoryDB
-from ..cloudinary_service import upload_image
+from ..media_service import upload_image, save_upload
 
 router = APIRouter(prefix="/stories", tags=["stories"])
 
@@ -53,11 +52,11 @@ async def create_story(
 
     suffix = os.path.splitext(file.filename)[1] or ".jpg"
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        shutil.copyfileobj(file.file, tmp)
+        await save_upload(file.file, tmp)
         tmp_path = tmp.name
 
     try:
-        result = upload_image(tmp_path, folder="feastverse/stories")
+        result = await upload_image(tmp_path, folder="feastverse/stories")
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=f"Failed to upload story: {result.get('error')}")
 
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Dict, Optional, List
 from datetime import datetime
 
 
@@ -52,6 +52,26 @@ class MenuItemCreate(MenuItemBase):
     pass
 
 
+class MenuItemUpdate(BaseModel):
+    name: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    image: Optional[str] = None
+    available: Optional[bool] = None
+
+    @field_validator("name", "price", "available")
+    @classmethod
+    def not_null(cls, value):
+        # May be omitted, but an explicit null would be stored on the item
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class MenuItemAvailability(BaseModel):
+    available: bool
+
+
 class MenuItem(MenuItemBase):
     id: str
     restaurant_id: str
@@ -67,6 +87,8 @@ class RestaurantBase(BaseModel):
     eta_mins: int
     image: str
     description: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
 
 
 class RestaurantCreate(RestaurantBase):
@@ -76,6 +98,9 @@ class RestaurantCreate(RestaurantBase):
 class Restaurant(RestaurantBase):
     id: str
     rating: float
+    rating_count: int = 0
+    followers_count: int = 0
+    subscribers_count: int = 0
     created_at: datetime
     menu_items: List[MenuItem] = []
 
@@ -83,6 +108,109 @@ class Restaurant(RestaurantBase):
         from_attributes = True
 
 
+class RestaurantListItem(BaseModel):
+    """Restaurant listing entry; only the requested fields are set"""
+    id: str
+    name: Optional[str] = None
+    cuisine: Optional[str] = None
+    rating: Optional[float] = None
+    rating_count: Optional[int] = None
+    delivery_fee: Optional[float] = None
+    eta_mins: Optional[int] = None
+    image: Optional[str] = None
+    description: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    followers_count: Optional[int] = None
+    subscribers_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    menu_items: Optional[List[MenuItem]] = None
+
+
+class NearbyRestaurant(BaseModel):
+    id: str
+    name: str
+    cuisine: str
+    rating: float
+    delivery_fee: float
+    eta_mins: int
+    image: str
+    description: Optional[str] = None
+    latitude: float
+    longitude: float
+    distance_m: float
+    adjusted_eta_mins: int
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class RestaurantFacets(BaseModel):
+    total: int
+    cuisine: List[FacetCount] = []
+    rating: List[FacetCount] = []
+    delivery_fee: List[FacetCount] = []
+
+
+class MenuItemMatch(BaseModel):
+    id: str
+    name: str
+    price: float
+    highlight: str
+
+
+class RestaurantSearchResult(BaseModel):
+    id: str
+    name: str
+    cuisine: str
+    rating: float
+    delivery_fee: float
+    eta_mins: int
+    image: str
+    description: Optional[str] = None
+    score: float
+    matched_menu_items: List[MenuItemMatch] = []
+
+
+class RecentRatingStats(BaseModel):
+    window_days: int
+    count: int = 0
+    average: float = 0.0
+    histogram: Dict[str, int] = {}
+    trend: float = 0.0  # Recent average minus the all-time rating
+    updated_at: Optional[datetime] = None
+
+
+class RatingStats(BaseModel):
+    restaurant_id: str
+    rating: float
+    rating_count: int
+    histogram: Dict[str, int]
+    recent: RecentRatingStats
+
+
+class RestaurantFollower(BaseModel):
+    user_id: str
+    name: Optional[str] = None
+    username: Optional[str] = None
+    picture: Optional[str] = None
+    followed_at: datetime
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    restaurants_created: int
+    menu_items_created: int
+    error_count: int
+    errors: List[ImportRowError] = []
+
+
 # Reel Schemas
 class ReelBase(BaseModel):
     title: str
@@ -101,6 +229,8 @@ class Reel(ReelBase):
     thumbnail_url: Optional[str]
     created_at: datetime
     likes: int = 0
+    views: int = 0
+    unique_viewers: int = 0
     user_name: Optional[str] = None
     user_username: Optional[str] = None
     user_picture: Optional[str] = None
@@ -109,6 +239,22 @@ class Reel(ReelBase):
         from_attributes = True
 
 
+class LikedReels(BaseModel):
+    liked: List[str] = []
+
+
+class ReelJob(BaseModel):
+    id: str
+    status: str
+    reel_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Story Schemas
 class StoryCreate(BaseModel):
     image_url: str
@@ -130,7 +276,7 @@ class Story(BaseModel):
 
 # Review Schemas
 class ReviewBase(BaseModel):
-    rating: int
+    rating: int = Field(..., ge=1, le=5)
     text: str
 
 
@@ -159,7 +305,10 @@ class OrderItemBase(BaseModel):
 
 
 class OrderItemCreate(OrderItemBase):
-    pass
+    # Name and price are looked up server-side; client values are ignored
+    name: Optional[str] = None
+    quantity: int = Field(..., ge=1)
+    price: Optional[float] = None
 
 
 class OrderItem(OrderItemBase):
@@ -177,13 +326,21 @@ class OrderBase(BaseModel):
 
 
 class OrderCreate(OrderBase):
-    items: List[OrderItemCreate]
+    total: Optional[float] = None  # Ignored; the server prices the order
+    items: List[OrderItemCreate] = Field(..., min_length=1)
+
+
+class OrderStatusChange(BaseModel):
+    status: str
+    at: datetime
 
 
 class Order(OrderBase):
     id: str
     user_id: str
+    restaurant_id: Optional[str] = None
     status: str
+    status_history: List[OrderStatusChange] = []
     created_at: datetime
     items: List[OrderItem] = []
 
@@ -0,0 +1,110 @@
+"""
+Restaurant search
+
+Exact-word matches come from the `restaurant_search_text` text index over
+name, cuisine, description and menu item names, ranked by textScore. When that
+finds too little, a fuzzy pass matches query trigrams against each
+restaurant's precomputed `search_ngrams` (multikey indexed), which catches
+typos such as "piza" or "biriyani".
+"""
+import html
+import re
+from typing import Iterable, List, Set
+
+# Fraction of the query's trigrams a fuzzy match has to share
+FUZZY_THRESHOLD = 0.5
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Padded per-word trigrams, as used by pg_trgm"""
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def restaurant_ngrams(name: str, cuisine: str, menu_item_names: Iterable[str] = ()) -> List[str]:
+    """The search_ngrams stored on a restaurant document"""
+    grams = trigrams(name) | trigrams(cuisine)
+    for item_name in menu_item_names:
+        grams |= trigrams(item_name)
+    return sorted(grams)
+
+
+def similarity(query_grams: Set[str], text: str) -> float:
+    if not query_grams:
+        return 0.0
+    return len(query_grams & trigrams(text)) / len(query_grams)
+
+
+def highlight(text: str, terms: List[str]) -> str:
+    """HTML-escape `text` and wrap occurrences of the query terms in <mark> tags"""
+    # Names are user supplied, so only the <mark> tags may reach clients as markup.
+    # Matching runs on the raw text and each piece is escaped separately, so a
+    # term can never land inside an entity such as &amp;
+    if not terms:
+        return html.escape(text)
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    parts, last = [], 0
+    for m in pattern.finditer(text):
+        parts.append(html.escape(text[last:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+        last = m.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
+
+
+def matched_menu_items(menu: List[dict], q: str) -> List[dict]:
+    """Menu items that match the query exactly or fuzzily, with highlights"""
+    terms = _words(q)
+    query_grams = trigrams(q)
+    matches = []
+    for item in menu:
+        name = item["name"]
+        exact = any(term in name.lower() for term in terms)
+        if exact or similarity(query_grams, name) >= FUZZY_THRESHOLD:
+            matches.append({
+                "id": item["_id"],
+                "name": name,
+                "price": item["price"],
+                "highlight": highlight(name, terms) if exact else f"<mark>{html.escape(name)}</mark>"
+            })
+    return matches
+
+
+async def search_restaurants(db, q: str, limit: int) -> List[dict]:
+    """Relevance-ranked restaurants for `q`, text matches first, then fuzzy ones"""
+    projection = {
+        "search_ngrams": 0,
+        "menu_item_names": 0,
+        "score": {"$meta": "textScore"}
+    }
+    results = await db.restaurants.find(
+        {"$text": {"$search": q}},
+        projection
+    ).sort([("score", {"$meta": "textScore"})]).limit(limit).to_list(length=limit)
+
+    query_grams = sorted(trigrams(q))
+    if len(results) < limit and query_grams:
+        min_overlap = max(1, int(len(query_grams) * FUZZY_THRESHOLD + 0.999))
+        seen = [r["_id"] for r in results]
+        pipeline = [
+            {"$match": {"search_ngrams": {"$in": query_grams}, "_id": {"$nin": seen}}},
+            {"$addFields": {"overlap": {"$size": {"$setIntersection": ["$search_ngrams", query_grams]}}}},
+            {"$match": {"overlap": {"$gte": min_overlap}}},
+            {"$sort": {"overlap": -1, "_id": 1}},
+            {"$limit": limit - len(results)},
+            {"$project": {"search_ngrams": 0, "menu_item_names": 0}},
+        ]
+        async for r in db.restaurants.aggregate(pipeline):
+            r["score"] = r.pop("overlap") / len(query_grams)
+            results.append(r)
+
+    return results
@@ -0,0 +1,80 @@
+"""
+Pluggable media storage backends
+
+CloudinaryStorage is the production backend. LocalStorage keeps files under
+UPLOAD_DIR (served from /uploads) so uploads and deletions work offline in
+development and tests. Select one with MEDIA_STORAGE_BACKEND or swap it at
+runtime with set_storage().
+"""
+import asyncio
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from . import media_service
+from .cloudinary_service import generate_video_thumbnail
+from .config import settings
+
+
+class CloudinaryStorage:
+    """Uploads reels to Cloudinary through the async media service"""
+
+    async def upload_video(self, file_path: str, public_id: str) -> dict:
+        return await media_service.upload_video(file_path, public_id=public_id)
+
+    async def delete_video(self, public_id: str) -> dict:
+        result = await media_service.delete_video(public_id)
+        # Deleting an asset that is already gone counts as done
+        if not result["success"] and result.get("result", {}).get("result") == "not found":
+            return {"success": True, "result": result["result"]}
+        return result
+
+    def thumbnail_url(self, public_id: str) -> Optional[str]:
+        return generate_video_thumbnail(public_id)
+
+
+class LocalStorage:
+    """Stand-in backend that copies reels under UPLOAD_DIR instead of uploading them"""
+
+    def __init__(self, root: str = settings.UPLOAD_DIR):
+        self.root = Path(root) / "reels"
+
+    async def upload_video(self, file_path: str, public_id: str) -> dict:
+        self.root.mkdir(parents=True, exist_ok=True)
+        filename = f"{public_id}{os.path.splitext(file_path)[1]}"
+        await asyncio.to_thread(shutil.copyfile, file_path, self.root / filename)
+        return {
+            "success": True,
+            "url": f"/uploads/reels/{filename}",
+            "public_id": filename,
+        }
+
+    async def delete_video(self, public_id: str) -> dict:
+        path = self.root / public_id
+        if path.exists():
+            path.unlink()
+        return {"success": True}
+
+    def thumbnail_url(self, public_id: str) -> Optional[str]:
+        return None
+
+
+_storage = None
+
+
+def get_storage():
+    """Return the configured storage backend"""
+    global _storage
+    if _storage is None:
+        if settings.MEDIA_STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        else:
+            _storage = CloudinaryStorage()
+    return _storage
+
+
+def set_storage(storage):
+    """Swap the storage backend (e.g. LocalStorage in tests)"""
+    global _storage
+    _storage = storage
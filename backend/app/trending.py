@@ -0,0 +1,56 @@
+"""
+Time-decayed trending score for reels
+
+    trending_score = (LIKE_WEIGHT * likes + VIEW_WEIGHT * views) * exp(-age / tau)
+
+with tau derived from TRENDING_HALF_LIFE_HOURS. Engagement adds its decayed
+weight to `trending_score` as it happens, and recompute_trending_scores
+periodically rewrites every score in the trending window with a single
+server-side pipeline update, so GET /reels/trending is one indexed sort.
+"""
+import math
+from datetime import datetime, timedelta
+
+from .config import settings
+from .database import get_database
+
+TAU_SECONDS = settings.TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def decay(created_at: datetime, now: datetime = None) -> float:
+    """Decay multiplier for engagement on a reel created at `created_at`"""
+    age = ((now or datetime.utcnow()) - created_at).total_seconds()
+    return math.exp(-max(age, 0) / TAU_SECONDS)
+
+
+def engagement_score(created_at: datetime, likes: int = 0, views: int = 0) -> float:
+    """Decayed score contribution of new likes/views (negative for unlikes)"""
+    weight = settings.TRENDING_LIKE_WEIGHT * likes + settings.TRENDING_VIEW_WEIGHT * views
+    return weight * decay(created_at)
+
+
+async def recompute_trending_scores():
+    """Re-rank all reels in the trending window in one batched server-side update"""
+    db = get_database()
+    now = datetime.utcnow()
+    horizon = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+
+    await db.reels.update_many(
+        {"created_at": {"$gte": horizon}},
+        [{"$set": {"trending_score": {"$multiply": [
+            {"$add": [
+                {"$multiply": [{"$ifNull": ["$likes_count", 0]}, settings.TRENDING_LIKE_WEIGHT]},
+                {"$multiply": [{"$ifNull": ["$views", 0]}, settings.TRENDING_VIEW_WEIGHT]}
+            ]},
+            {"$exp": {"$divide": [
+                {"$subtract": ["$created_at", now]},
+                TAU_SECONDS * 1000
+            ]}}
+        ]}}}]
+    )
+
+    # Reels that aged out of the window drop off the trending page
+    await db.reels.update_many(
+        {"created_at": {"$lt": horizon}, "trending_score": {"$gt": 0}},
+        {"$set": {"trending_score": 0.0}}
+    )
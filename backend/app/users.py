@@ -0,0 +1,20 @@
+"""
+Users collection helpers
+"""
+from typing import Iterable
+
+from bson import ObjectId
+
+
+async def fetch_users(db, docs: Iterable[dict], projection: dict, field: str = "user_id") -> dict:
+    """Load the users referenced by `field` of a page of documents in one query, keyed by user id"""
+    user_ids = {ObjectId(d[field]) for d in docs if ObjectId.is_valid(d[field])}
+    if not user_ids:
+        return {}
+
+    users = await db.users.find(
+        {"_id": {"$in": list(user_ids)}},
+        projection
+    ).to_list(length=len(user_ids))
+
+    return {str(u["_id"]): u for u in users}
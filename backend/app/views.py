@@ -0,0 +1,91 @@
+"""
+Write-behind reel view counting
+
+View events are aggregated in memory per worker and flushed periodically
+as one unordered bulk_write: `$inc` on `views` and per-register `$max` on
+the reel's `viewers_hll` HyperLogLog sketch. After each flush the
+`unique_viewers` estimate and trending score are refreshed for the reels
+that were touched.
+"""
+from collections import Counter
+from typing import Dict
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from . import hyperloglog
+from .database import get_database
+from .trending import engagement_score
+
+_pending_views: Counter = Counter()
+_pending_registers: Dict[str, Dict[int, int]] = {}
+
+
+def record_view(reel_id: str, viewer_key: str):
+    """Buffer one view of a reel by an (authenticated or anonymous) viewer"""
+    _pending_views[reel_id] += 1
+    hyperloglog.add(_pending_registers.setdefault(reel_id, {}), viewer_key)
+
+
+def _requeue(views: Counter, registers: Dict[str, Dict[int, int]]):
+    """Put unwritten views back so the next flush retries them"""
+    _pending_views.update(views)
+    for reel_id, batch in registers.items():
+        pending = _pending_registers.setdefault(reel_id, {})
+        for i, rank in batch.items():
+            pending[i] = max(pending.get(i, 0), rank)
+
+
+async def flush_views():
+    """Write buffered view counts and sketches to MongoDB"""
+    global _pending_views, _pending_registers
+    if not _pending_views:
+        return
+
+    views, registers = _pending_views, _pending_registers
+    _pending_views, _pending_registers = Counter(), {}
+
+    db = get_database()
+    batch = list(views)
+    updates = [
+        UpdateOne(
+            {"_id": ObjectId(reel_id)},
+            {
+                "$inc": {"views": views[reel_id]},
+                "$max": {f"viewers_hll.{i}": rank for i, rank in registers.get(reel_id, {}).items()}
+            }
+        )
+        for reel_id in batch
+    ]
+    try:
+        await db.reels.bulk_write(updates, ordered=False)
+    except BulkWriteError as e:
+        # The other operations were applied; retrying them would count their views twice
+        failed = {batch[err["index"]] for err in e.details.get("writeErrors", [])}
+        _requeue(
+            Counter({reel_id: views[reel_id] for reel_id in failed}),
+            {reel_id: registers[reel_id] for reel_id in failed if reel_id in registers}
+        )
+        print(f"❌ View flush failed for {len(failed)} reels, retrying next flush")
+        batch = [reel_id for reel_id in batch if reel_id not in failed]
+    except Exception:
+        _requeue(views, registers)
+        raise
+
+    # Refresh the estimates from the merged sketches and credit the trending score
+    estimates = [
+        UpdateOne(
+            {"_id": reel["_id"]},
+            {
+                "$set": {"unique_viewers": hyperloglog.estimate(reel.get("viewers_hll", {}))},
+                "$inc": {"trending_score": engagement_score(reel["created_at"], views=views[str(reel["_id"])])}
+            }
+        )
+        async for reel in db.reels.find(
+            {"_id": {"$in": [ObjectId(reel_id) for reel_id in batch]}},
+            {"viewers_hll": 1, "created_at": 1}
+        )
+    ]
+    if estimates:
+        await db.reels.bulk_write(estimates, ordered=False)